@@ -1,32 +1,59 @@
+import os
 from flask import Flask
 from flask_cors import CORS
-from chatbot_routes import chatbot_bp 
-from player_comparison_routes import player_bp
-from chart_routes import chart_bp
-from radar_chart_routes import radar_chart_bp
 
+# Build the chatbot's model, database and agent in a background thread at startup
+# instead of on the first /chat request
+CHAT_WARMUP = os.getenv("CHAT_WARMUP", "1") == "1"
 
 
-app = Flask(__name__)
+def create_app(warm_up=CHAT_WARMUP):
+    from chatbot_routes import chatbot_bp, start_warm_up
+    from chat_tracing import metrics_bp
+    from player_comparison_routes import player_bp
+    from chart_routes import chart_bp
+    from radar_chart_routes import radar_chart_bp
+    from game_log_routes import game_log_bp
+    from database import get_pool
 
-CORS(app, resources={
-    r"/*": {
-        "origins": ["http://localhost:3000"],
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
-    }
-})
+    app = Flask(__name__)
 
-app.register_blueprint(chatbot_bp)
-app.register_blueprint(player_bp)
-app.register_blueprint(chart_bp)
-app.register_blueprint(radar_chart_bp)
+    CORS(app, resources={
+        r"/*": {
+            "origins": ["http://localhost:3000"],
+            "methods": ["GET", "POST", "OPTIONS"],
+            "allow_headers": ["Content-Type"]
+        }
+    })
 
-@app.route('/')
-def index():
-    return 'Backend is up and running! 🚀'
+    app.register_blueprint(chatbot_bp)
+    app.register_blueprint(player_bp)
+    app.register_blueprint(chart_bp)
+    app.register_blueprint(radar_chart_bp)
+    app.register_blueprint(game_log_bp)
+    app.register_blueprint(metrics_bp)
 
+    @app.route('/')
+    def index():
+        return 'Backend is up and running! 🚀'
+
+    # Open the read-only connections before the first request needs one
+    get_pool().warm(2)
+    if warm_up:
+        start_warm_up()
+
+    return app
+
+
+def __getattr__(name):
+    # `app` is built on first access, so importing this module (wsgi.py, the tests) doesn't
+    # build one, while `flask run`, `gunicorn app:app` and `from app import app` still find it
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5001)
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    create_app(warm_up=CHAT_WARMUP and os.getenv("WERKZEUG_RUN_MAIN") == "true").run(debug=True, port=5001)
@@ -0,0 +1,57 @@
+"""
+Micro-benchmark: per-request SQL agent setup before and after caching the graph.
+
+Before: every db_query request formatted the system prompt and called
+create_react_agent(), recompiling the LangGraph graph.
+After: get_sql_agent() returns the graph compiled on first use.
+
+No LLM calls are made; only graph construction is timed.
+
+Usage (from flask-backend/):
+    python benchmarks/bench_agent_setup.py [--iterations 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# ChatOpenAI only needs a key to be constructed; nothing is sent
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+
+import chatbot_routes  # noqa: E402
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<32} mean {statistics.mean(samples):8.3f} ms   median {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    before = time_calls(chatbot_routes.build_sql_agent, args.iterations)
+    chatbot_routes.get_sql_agent()  # first use compiles the shared graph
+    after = time_calls(chatbot_routes.get_sql_agent, args.iterations)
+
+    print(f"SQL agent setup per request ({args.iterations} iterations)")
+    report("before: build per request", before)
+    report("after: shared compiled graph", after)
+    print(f"speedup: {statistics.mean(before) / max(statistics.mean(after), 1e-9):,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
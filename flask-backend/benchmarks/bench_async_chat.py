@@ -0,0 +1,99 @@
+"""
+Chat throughput in sync vs async execution against the fake OpenAI server.
+
+Starts benchmarks/fake_openai_server.py in-process with a fixed reply latency, points
+the chat model at it and sends concurrent POST /chat requests through the Flask test
+client, once per execution mode. The response cache and SQL fast path are disabled so
+every request runs the full LLM pipeline. Reports wall time, requests/s, latency
+percentiles and the peak number of threads in the process.
+
+Usage (from flask-backend/):
+    python benchmarks/bench_async_chat.py [--requests 64] [--concurrency 32] [--latency 0.2] [--route direct_answer]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_openai_server import serve  # noqa: E402
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def app_thread_count():
+    """ Threads in the process, not counting the fake server's connection handlers """
+    return sum(1 for t in threading.enumerate() if "process_request_thread" not in t.name)
+
+
+def run_mode(client, execution, args):
+    peak = [app_thread_count()]
+    done = threading.Event()
+
+    def sample_threads():
+        while not done.is_set():
+            peak[0] = max(peak[0], app_thread_count())
+            time.sleep(0.01)
+
+    def one(i):
+        start = time.perf_counter()
+        response = client.post("/chat", json={
+            "message": f"Benchmark question number {i}",
+            "thread_id": f"bench-{execution}-{i}",
+            "execution": execution,
+            "mode": args.mode,
+        })
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return time.perf_counter() - start
+
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    print(
+        f"{execution:<6} wall {wall:6.2f}s  {args.requests / wall:6.1f} req/s  "
+        f"p50 {statistics.median(latencies):5.2f}s  p95 {percentile(latencies, 0.95):5.2f}s  "
+        f"peak threads {peak[0]}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM reply latency in seconds")
+    parser.add_argument("--route", default="direct_answer", choices=["direct_answer", "db_query"])
+    parser.add_argument("--mode", default="classic", choices=["classic", "fast"])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.route)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["CHAT_CACHE_ENABLED"] = "0"
+    os.environ["SQL_FAST_PATH_ENABLED"] = "0"
+
+    import app
+    client = app.create_app(warm_up=False).test_client()
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.latency}s fake LLM latency, route {args.route}, {args.mode} mode")
+    for execution in ("sync", "async"):
+        run_mode(client, execution, args)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
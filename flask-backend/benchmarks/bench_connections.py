@@ -0,0 +1,63 @@
+"""
+Per-request sqlite3.connect() vs the shared read-only pool (database.py).
+
+Times one typical blueprint query (a TeamStats row by team) both ways:
+
+    before  sqlite3.connect(DB_PATH), query, close
+    after   with read_connection(): query
+
+Usage (from flask-backend/):
+    python benchmarks/bench_connections.py [--iterations 2000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import DB_PATH, read_connection  # noqa: E402
+
+QUERY = "SELECT * FROM TeamStats WHERE team = ?"
+
+
+def before():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute(QUERY, ("UCDavis",)).fetchall()
+    finally:
+        conn.close()
+
+
+def after():
+    with read_connection() as conn:
+        return conn.execute(QUERY, ("UCDavis",)).fetchall()
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    assert before() == after()
+    old = time_calls(before, args.iterations)
+    new = time_calls(after, args.iterations)
+    print(f"TeamStats lookup, {args.iterations} iterations")
+    print(f"before: connect per request   median {statistics.median(old):8.1f} us")
+    print(f"after:  pooled read-only      median {statistics.median(new):8.1f} us")
+    print(f"speedup: {statistics.median(old) / statistics.median(new):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Player-efficiency serialization: iterrows loop vs vectorized coercion.
+
+Builds a synthetic league-sized <team>_player_stats table in a temporary SQLite file
+(a share of rows have blank or non-numeric stats), ingests it into AllPlayers and times,
+from query to JSON text:
+
+    before  <team>_player_stats + fillna('') + iterrows() + float() per cell in try/except + json.dumps
+    after   chart_routes.load_player_stats + coerce_player_stats + to_dict + json.dumps (as jsonify)
+
+Usage (from flask-backend/):
+    python benchmarks/bench_player_efficiency.py [--players 5000] [--invalid 0.02] [--iterations 10]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd  # noqa: E402
+import ingest  # noqa: E402
+from chart_routes import EFFICIENCY_FIELDS, NUMERIC_FIELDS, coerce_player_stats, load_player_stats  # noqa: E402
+
+TEAM = "League"
+
+
+def build_table(path, players, invalid_share, seed=7):
+    rng = random.Random(seed)
+    columns = list(EFFICIENCY_FIELDS.values())
+    rows = []
+    for i in range(players):
+        row = [f"Player {i}"] + [round(rng.uniform(0, 35), 1) for _ in NUMERIC_FIELDS] + [f"https://example.com/{i}.jpg"]
+        if rng.random() < invalid_share:
+            row[rng.randint(1, len(NUMERIC_FIELDS))] = rng.choice([None, "", "DNP"])
+        rows.append(row)
+    conn = sqlite3.connect(path)
+    conn.execute(f'CREATE TABLE "{TEAM}_player_stats" ({", ".join(f"{chr(34)}{c}{chr(34)}" for c in columns)})')
+    conn.executemany(f'INSERT INTO "{TEAM}_player_stats" VALUES ({", ".join("?" for _ in columns)})', rows)
+    conn.commit()
+    ingest.run_ingest(conn)
+    conn.close()
+
+
+def before(conn):
+    """ The previous chart_routes implementation """
+    query = f"""
+    SELECT
+        "Player Name", "Minutes/gm", "PTS/gm", "Assists/gm", "Turnovers/gm", "STL/gm", "BLK/gm", "Image URL"
+    FROM "{TEAM}_player_stats"
+    """
+    player_stats = pd.read_sql_query(query, conn)
+    player_stats = player_stats.fillna('')
+    data = []
+    for _, row in player_stats.iterrows():
+        try:
+            data.append({
+                "player": row['Player Name'],
+                "mpg": float(row['Minutes/gm']),
+                "ppg": float(row['PTS/gm']),
+                "apg": float(row['Assists/gm']),
+                "topg": float(row['Turnovers/gm']),
+                "spg": float(row['STL/gm']),
+                "bpg": float(row['BLK/gm']),
+                "image": row['Image URL']
+            })
+        except Exception:
+            pass
+    return json.dumps(data)
+
+
+def after(conn):
+    valid, _ = coerce_player_stats(load_player_stats(conn, TEAM))
+    return json.dumps(valid.to_dict(orient="records"), sort_keys=True, separators=(",", ":"))
+
+
+def time_calls(fn, conn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(conn)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--invalid", type=float, default=0.02, help="share of rows with a bad stat")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "league.db")
+        build_table(path, args.players, args.invalid)
+        conn = sqlite3.connect(path)
+        try:
+            old_rows, new_rows = json.loads(before(conn)), json.loads(after(conn))
+            assert old_rows == new_rows, "outputs differ"
+            old = time_calls(before, conn, args.iterations)
+            new = time_calls(after, conn, args.iterations)
+        finally:
+            conn.close()
+
+    print(f"{args.players} players, {args.players - len(new_rows)} invalid rows, {args.iterations} iterations")
+    print(f"before: iterrows      median {statistics.median(old):8.2f} ms")
+    print(f"after:  vectorized    median {statistics.median(new):8.2f} ms")
+    print(f"speedup: {statistics.median(old) / statistics.median(new):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Player-name typeahead: linear rapidfuzz scan vs roster_index.PlayerSearchIndex.
+
+Builds a synthetic roster (CSV-style "Last, First" names, some with jersey-number
+prefixes or hyphenated surnames) and times a mix of queries:
+
+    before  process.extract over every player's normalized name
+    after   PlayerSearchIndex.search (prefix index, then trigram candidates + rapidfuzz)
+
+Usage (from flask-backend/):
+    python benchmarks/bench_player_search.py [--players 5000] [--queries 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rapidfuzz import fuzz, process  # noqa: E402
+from roster_index import PlayerSearchIndex, search_key  # noqa: E402
+
+FIRST = ["TY", "Connor", "Elijah", "Marcus", "Aniwaniwa", "Devin", "Jordan", "Keonte", "Austin", "Evans",
+         "Koat", "Jacopo", "Kadar", "Tom", "Isaiah", "Malik", "Andre", "Jalen", "Trey", "Cameron"]
+LAST = ["Johnson", "Sevilla", "Tait-Jones", "Askew", "Brinson", "Kipruto", "Waller", "Beattie", "Richard",
+        "Van der Knaap", "Keat Tong", "Pepper", "Milling", "Thompson", "Nguyen", "Okafor", "Garcia", "Lee"]
+
+
+def build_entries(players, seed=11):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(players):
+        name = f"{rng.choice(LAST)}{i}, {rng.choice(FIRST)}"
+        if rng.random() < 0.05:
+            name = f"{rng.randint(0, 99):02d} {name}"
+        entries.append({"name": name, "team": f"Team{i % 40}"})
+    return entries
+
+
+def make_queries(entries, count, seed=13):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        key = search_key(rng.choice(entries)["name"])
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(key[:rng.randint(2, 6)])  # typing
+        elif kind < 0.7:
+            first, *rest = key.split()
+            queries.append(f"{' '.join(rest)}, {first}")  # "Last, First"
+        else:
+            i = rng.randrange(1, len(key) - 1)
+            queries.append(key[:i] + key[i + 1:])  # a dropped letter
+    return queries
+
+
+def time_queries(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:28} p50 {statistics.median(ordered):7.3f} ms   p99 {p99:7.3f} ms   max {ordered[-1]:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    entries = build_entries(args.players)
+    queries = make_queries(entries, args.queries)
+
+    start = time.perf_counter()
+    index = PlayerSearchIndex(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+    keys = [search_key(e["name"]) for e in entries]
+
+    def before(q):
+        return process.extract(search_key(q), keys, scorer=fuzz.WRatio, limit=10)
+
+    def after(q):
+        return index.search(q, limit=10)
+
+    print(f"{args.players} players, {args.queries} queries, index built in {build_ms:.0f} ms")
+    report("before: linear rapidfuzz", time_queries(before, queries))
+    report("after:  PlayerSearchIndex", time_queries(after, queries))
+
+
+if __name__ == "__main__":
+    main()
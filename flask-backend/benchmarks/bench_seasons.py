@@ -0,0 +1,137 @@
+"""
+Storage layout at league scale: per-team tables vs the long-format AllPlayers.
+
+For a growing number of seasons, builds two synthetic databases in a temporary
+directory with --teams teams of --roster players each:
+
+    per-team  one <team><season>_player_stats table per team and season (what the
+              scrapers produce), described to the prompts by schema_catalog
+    long      AllPlayers keyed by (season, team, player) plus TeamStats with a season
+              column, as left by migrate.py
+
+and reports the prompt schema size for both, and for the long layout the latency of a
+three-player fetch_players lookup and of a roster_index build (latest season only).
+
+Usage (from flask-backend/):
+    python benchmarks/bench_seasons.py [--seasons 1,5,10] [--teams 360] [--roster 15] [--lookups 300]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ingest import PLAYER_COLUMNS, PLAYER_SCHEMA, PLAYER_TABLE, create_player_table, name_key  # noqa: E402
+from player_store import fetch_players  # noqa: E402
+from roster_index import RosterIndex  # noqa: E402
+from schema_catalog import SchemaCatalog  # noqa: E402
+
+
+def season_label(i):
+    return f"{2000 + i}-{(i + 1) % 100:02d}"
+
+
+def player_name(team, season, i):
+    # Most players stay on a team for a few seasons
+    return f"Player{team}x{(season // 4) * 100 + i} Tester"
+
+
+def player_row(rng, name):
+    row = {c: round(rng.uniform(0, 30), 1) for c, t in PLAYER_SCHEMA.items() if t == "REAL"}
+    row.update({"Number": rng.randint(0, 99), "Player Name": name, "Games Played": 30, "Games Started": 10, "Image URL": None})
+    return [row[c] for c in PLAYER_COLUMNS]
+
+
+def team_stats(conn, teams, seasons, with_season):
+    season_sql = ", season TEXT" if with_season else ""
+    conn.execute(f'CREATE TABLE TeamStats (team TEXT, "PTS/gm" REAL, "FG%" REAL{season_sql})')
+    for s in range(seasons if with_season else 1):
+        extra = [season_label(s)] if with_season else []
+        conn.executemany(
+            f'INSERT INTO TeamStats VALUES (?, 70, 45{", ?" if with_season else ""})',
+            [[f"Team{t}", *extra] for t in range(teams)],
+        )
+
+
+def build_per_team(path, teams, seasons, roster, rng):
+    conn = sqlite3.connect(path)
+    columns = ", ".join(f'"{c}" {t.split()[0]}' for c, t in PLAYER_SCHEMA.items())
+    for s in range(seasons):
+        for t in range(teams):
+            table = f"Team{t}S{s}_player_stats"
+            conn.execute(f'CREATE TABLE "{table}" ({columns})')
+            conn.executemany(
+                f'INSERT INTO "{table}" VALUES ({", ".join("?" for _ in PLAYER_COLUMNS)})',
+                [player_row(rng, player_name(t, s, i)) for i in range(roster)],
+            )
+    team_stats(conn, teams, seasons, with_season=False)
+    conn.commit()
+    conn.close()
+
+
+def build_long(path, teams, seasons, roster, rng):
+    conn = sqlite3.connect(path)
+    create_player_table(conn)
+    placeholders = ", ".join("?" for _ in range(len(PLAYER_COLUMNS) + 4))
+    quoted = ", ".join(f'"{c}"' for c in PLAYER_COLUMNS)
+    for s in range(seasons):
+        rows = []
+        for t in range(teams):
+            for i in range(roster):
+                name = player_name(t, s, i)
+                rows.append([season_label(s), f"Team{t}", None, name_key(name)] + player_row(rng, name))
+        conn.executemany(f'INSERT INTO "{PLAYER_TABLE}" (season, team, source_table, name_key, {quoted}) VALUES ({placeholders})', rows)
+    team_stats(conn, teams, seasons, with_season=True)
+    conn.commit()
+    conn.close()
+
+
+def median_ms(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", default="1,5,10")
+    parser.add_argument("--teams", type=int, default=360)
+    parser.add_argument("--roster", type=int, default=15)
+    parser.add_argument("--lookups", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{args.teams} teams x {args.roster} players per season")
+    print(f"{'seasons':>8}{'rows':>9}{'per-team tokens':>17}{'long tokens':>13}{'lookup ms':>11}{'roster ms':>11}")
+    for seasons in (int(s) for s in args.seasons.split(",")):
+        rng = random.Random(seasons)
+        with tempfile.TemporaryDirectory() as tmp:
+            per_team, long = os.path.join(tmp, "per_team.db"), os.path.join(tmp, "long.db")
+            build_per_team(per_team, args.teams, seasons, args.roster, rng)
+            build_long(long, args.teams, seasons, args.roster, rng)
+            per_team_tokens = SchemaCatalog(per_team).for_question("How is Team1 doing?")[1]["tokens"]
+            long_tokens = SchemaCatalog(long).for_question("How is Team1 doing?")[1]["tokens"]
+
+            last = seasons - 1
+            names = [player_name(rng.randrange(args.teams), last, rng.randrange(args.roster)) for _ in range(args.lookups * 3)]
+            batches = iter([names[i:i + 3] for i in range(0, len(names), 3)])
+            conn = sqlite3.connect(long)
+            try:
+                lookup = median_ms(lambda: fetch_players(conn, next(batches)), args.lookups)
+            finally:
+                conn.close()
+            index = RosterIndex(long)
+            roster = median_ms(index._build, 3)
+            rows = seasons * args.teams * args.roster
+        print(f"{seasons:>8}{rows:>9}{per_team_tokens:>17}{long_tokens:>13}{lookup:>11.3f}{roster:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Startup benchmark: time from a fresh interpreter to the first successful responses.
+
+Each run starts a new Python process that imports app, calls create_app() and then
+requests /, /players, /api/player-efficiency/UCDavis and /api/radar-chart/UCDavis
+through the test client. Modes:
+
+    lazy        create_app(warm_up=False); chatbot resources are built on first /chat
+    background  create_app(warm_up=True); chatbot warm-up runs in a background thread
+    eager       create_app() followed by a blocking warm_up(), which is roughly what
+                importing chatbot_routes used to cost before the app could serve anything
+
+No OpenAI calls are made. In eager mode the hub prompt pull may be attempted, and
+the vendored prompt is used if it fails.
+
+Usage (from flask-backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--modes lazy background eager]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENDPOINTS = ["/", "/players", "/api/player-efficiency/UCDavis", "/api/radar-chart/UCDavis"]
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+mode = sys.argv[1]
+import app
+flask_app = app.create_app(warm_up=(mode == "background"))
+if mode == "eager":
+    import chatbot_routes
+    chatbot_routes.warm_up()
+timings = {"create_app": time.perf_counter() - start}
+client = flask_app.test_client()
+for url in json.loads(sys.argv[2]):
+    response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    timings[url] = time.perf_counter() - start
+print("TIMINGS " + json.dumps(timings))
+"""
+
+
+def run_once(mode):
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "benchmark-placeholder"))
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, json.dumps(ENDPOINTS)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    line = next(l for l in out.splitlines() if l.startswith("TIMINGS "))
+    return json.loads(line[len("TIMINGS "):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["lazy", "background", "eager"])
+    args = parser.parse_args()
+
+    print(f"Seconds from interpreter start until each step completes (median of {args.runs} runs)")
+    keys = ["create_app"] + ENDPOINTS
+    widths = [max(len(k), 8) + 2 for k in keys]
+    print(f"{'mode':<12}" + "".join(f"{k:>{w}}" for k, w in zip(keys, widths)))
+    for mode in args.modes:
+        runs = [run_once(mode) for _ in range(args.runs)]
+        print(f"{mode:<12}" + "".join(f"{statistics.median(r[k] for r in runs):>{w}.3f}" for k, w in zip(keys, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline testing.
+
+Answers POST /v1/chat/completions after a fixed delay, so the chat pipeline can be
+exercised and load-tested without network access or API costs. It understands just
+enough of the API for what chatbot_routes sends:
+
+- plain prompts get a short text reply (a team list for the team extraction prompt,
+  a route for the supervisor prompt)
+- structured output (a forced tool call, or response_format=json_schema) gets
+  arguments filled in from the JSON schema
+- agent calls that merely offer tools get a final text answer, so the ReAct loop stops
+  (with agent_sql, the agent first runs one sql_db_query call)
+- stream=true replies are sent as SSE chunks
+
+It can also record and replay real answers (JSONL, one reply per line keyed on a hash
+of the request): with --record FILE --upstream URL every request is forwarded to a
+real OpenAI-compatible API and its reply saved; with --replay FILE recorded replies
+are served, and requests that weren't recorded fall back to the synthetic replies.
+
+Usage (from flask-backend/):
+    python benchmarks/fake_openai_server.py [--port 8008] [--latency 0.2] [--route direct_answer]
+    python benchmarks/fake_openai_server.py --record replies.jsonl --upstream https://api.openai.com/v1
+    python benchmarks/fake_openai_server.py --replay replies.jsonl
+    OPENAI_BASE_URL=http://127.0.0.1:8008/v1 OPENAI_API_KEY=fake python app.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Request fields that decide the reply; the rest (temperature, ids...) don't affect replay
+REPLAY_KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "response_format", "stream")
+
+
+def _value_for(schema: dict, name: str, route: str):
+    """ Smallest value that satisfies a JSON schema fragment """
+    if "enum" in schema:
+        return route if name == "route" and route in schema["enum"] else schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {k: _value_for(v, k, route) for k, v in schema.get("properties", {}).items()}
+    if kind == "array":
+        if name == "teams":
+            return ["UCDavis", "Conference Average"]
+        return [_value_for(schema.get("items", {}), name, route)]
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "boolean":
+        return True
+    if name == "questions":
+        return "What is UC Davis' team FG%?"
+    return "fake"
+
+
+def _text_reply(prompt: str, route: str) -> str:
+    if 'Output format: ["TEAM1", "TEAM2"]' in prompt:
+        return '["UCDavis", "Conference Average"]'
+    if "decide whether to answer directly or to query the database" in prompt:
+        return route
+    return "Fake answer: UC Davis is shooting 45.0% from the field."
+
+
+AGENT_SQL = 'SELECT "FG%" FROM TeamStats WHERE team = \'UCDavis\''
+
+def completion(body: dict, route: str, agent_sql: bool = False) -> dict:
+    messages = body.get("messages") or []
+    prompt = "\n".join(str(m.get("content") or "") for m in messages)
+    message = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+
+    tool_choice = body.get("tool_choice")
+    forced = isinstance(tool_choice, dict) and tool_choice.get("function", {}).get("name")
+    response_format = body.get("response_format") or {}
+    if forced:
+        tool = next(t for t in body.get("tools", []) if t["function"]["name"] == forced)
+        arguments = _value_for(tool["function"].get("parameters", {}), "", route)
+        message["tool_calls"] = [{
+            "id": f"call_{int(time.time() * 1000)}", "type": "function",
+            "function": {"name": forced, "arguments": json.dumps(arguments)},
+        }]
+        finish_reason = "tool_calls"
+    elif (
+        agent_sql
+        and any(t["function"]["name"] == "sql_db_query" for t in body.get("tools", []))
+        and not any(m.get("role") == "tool" for m in messages)
+    ):
+        message["tool_calls"] = [{
+            "id": f"call_{int(time.time() * 1000)}", "type": "function",
+            "function": {"name": "sql_db_query", "arguments": json.dumps({"query": AGENT_SQL})},
+        }]
+        finish_reason = "tool_calls"
+    elif response_format.get("type") == "json_schema":
+        message["content"] = json.dumps(_value_for(response_format["json_schema"].get("schema", {}), "", route))
+    else:
+        message["content"] = _text_reply(prompt, route)
+
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 16, "total_tokens": len(prompt) // 4 + 16},
+    }
+
+
+def request_key(body: dict) -> str:
+    canonical = json.dumps({k: body.get(k) for k in REPLAY_KEY_FIELDS}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class Recording:
+    """ Replies by request key, loaded from and appended to a JSONL file """
+
+    def __init__(self, path: str, upstream: str = None):
+        self.path = path
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.replies = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        reply = json.loads(line)
+                        self.replies[reply["key"]] = reply
+
+    def get(self, key: str):
+        with self._lock:
+            reply = self.replies.get(key)
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return reply
+
+    def save(self, reply: dict):
+        with self._lock:
+            self.replies[reply["key"]] = reply
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(reply) + "\n")
+
+    def forward(self, key: str, path: str, raw: bytes, headers) -> dict:
+        """ Send the request upstream and record the reply """
+        request = urllib.request.Request(
+            self.upstream + path[path.index("/chat/completions"):], data=raw, method="POST",
+            headers={"Content-Type": "application/json", "Authorization": headers.get("Authorization", "")},
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                status, content_type, payload = response.status, response.headers.get("Content-Type"), response.read()
+        except urllib.error.HTTPError as e:
+            status, content_type, payload = e.code, e.headers.get("Content-Type"), e.read()
+        reply = {
+            "key": key, "status": status, "content_type": content_type or "application/json",
+            "body": payload.decode("utf-8"), "latency": round(time.perf_counter() - start, 3),
+        }
+        if status == 200:
+            self.save(reply)
+        return reply
+
+
+def make_handler(latency: float, route: str, agent_sql: bool = False, recording: Recording = None, recorded_latency: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: bytes, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = json.loads(raw or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, b'{"error": {"message": "not found"}}')
+                return
+            if recording is not None:
+                key = request_key(body)
+                if recording.upstream:
+                    reply = recording.forward(key, self.path, raw, self.headers)
+                else:
+                    reply = recording.get(key)
+                    if reply is not None:
+                        time.sleep(reply["latency"] if recorded_latency else latency)
+                if reply is not None:
+                    self._send(reply["status"], reply["body"].encode("utf-8"), reply["content_type"])
+                    return
+            time.sleep(latency)
+            reply = completion(body, route, agent_sql)
+            if not body.get("stream"):
+                self._send(200, json.dumps(reply).encode())
+                return
+            message = reply["choices"][0]["message"]
+            usage = reply.pop("usage")
+            chunks = []
+            for word in (message.get("content") or "").split(" "):
+                delta = {"content": word + " "}
+                chunks.append({**reply, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            chunks.append({**reply, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunks.append({**reply, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+            payload = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+            self._send(200, payload.encode(), "text/event-stream")
+
+    return Handler
+
+
+def serve(port: int = 8008, latency: float = 0.2, route: str = "direct_answer", agent_sql: bool = False,
+          recording: Recording = None, recorded_latency: bool = False):
+    """ Start the server in a daemon thread; returns the server (call shutdown() to stop) """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, route, agent_sql, recording, recorded_latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to wait before each reply")
+    parser.add_argument("--route", default="direct_answer", choices=["direct_answer", "db_query", "__end__"])
+    parser.add_argument("--agent-sql", action="store_true", help="make the SQL agent run one query before answering")
+    parser.add_argument("--record", metavar="FILE", help="forward to --upstream and save the replies")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1")
+    parser.add_argument("--replay", metavar="FILE", help="serve the replies recorded in FILE")
+    parser.add_argument("--recorded-latency", action="store_true", help="replay with the recorded latency instead of --latency")
+    args = parser.parse_args()
+    recording = Recording(args.record, args.upstream) if args.record else Recording(args.replay) if args.replay else None
+    handler = make_handler(args.latency, args.route, args.agent_sql, recording, args.recorded_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    print(f"Fake OpenAI server on http://127.0.0.1:{args.port}/v1 (latency {args.latency}s, route {args.route})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
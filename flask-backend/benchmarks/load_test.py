@@ -0,0 +1,235 @@
+"""
+Offline load test for the whole backend.
+
+Starts the Flask app in-process (create_app() + test client) with the chat model
+pointed at benchmarks/fake_openai_server.py, then drives a mix of endpoints from a
+thread pool and reports per-endpoint and overall latency percentiles and requests/s.
+No network access or API key is needed.
+
+Endpoints (--endpoints, comma separated; default: all):
+    chat       POST /chat, rotating through CHAT_QUESTIONS, a new thread per request
+    compare    GET /compare?player1=&player2= for pairs from the roster
+    players    GET /players
+    charts     GET /api/player-efficiency/<team>
+    radar      GET /api/radar-chart/batch?teams=<team>,conference-average
+
+LLM replies:
+    default               deterministic synthetic replies after --latency seconds
+    --replay FILE         replies recorded with fake_openai_server.py --record
+                          (requests that weren't recorded get synthetic replies)
+    --record FILE         forward to --upstream and record; needs network and a real key
+
+Each endpoint is called once before the measured run, so caches, the connection pool
+and the SQL agent are built. GET responses come from db_cache's response cache as in
+production; --no-response-cache measures the uncached handlers instead.
+
+With --url the requests go over HTTP to an already running server instead (e.g.
+gunicorn, started with OPENAI_BASE_URL pointing at a fake_openai_server.py).
+
+Usage (from flask-backend/):
+    python benchmarks/load_test.py [--requests 200] [--concurrency 16] [--latency 0.05]
+        [--endpoints chat,players] [--execution sync|async] [--mode classic|fast]
+        [--replay replies.jsonl] [--json results.json]
+    python benchmarks/load_test.py --url http://127.0.0.1:5001 [--requests 200] [--concurrency 64]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_openai_server import Recording, serve  # noqa: E402
+
+ENDPOINTS = ("chat", "compare", "players", "charts", "radar")
+# A stat lookup (SQL fast path), a scouting question (agent) and small talk
+CHAT_QUESTIONS = [
+    "How many points does TY Johnson average?",
+    "Give me a scouting report on UC Riverside",
+    "Compare UC Davis and UC Irvine rebounding",
+    "Hi, who are you?",
+]
+
+
+class HttpClient:
+    """ The subset of the Flask test client API used here, over HTTP """
+
+    class _Response:
+        def __init__(self, response):
+            self.status_code = response.status_code
+            self._response = response
+
+        def get_json(self):
+            return self._response.json()
+
+    def __init__(self, base_url, concurrency):
+        import httpx
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        self._client = httpx.Client(base_url=base_url, limits=limits, timeout=300)
+
+    def get(self, path, query_string=None):
+        return self._Response(self._client.get(path, params=query_string))
+
+    def post(self, path, json=None):
+        return self._Response(self._client.post(path, json=json))
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def build_requests(client, args):
+    """ (endpoint, callable) pairs for the run, interleaved and shuffled with a fixed seed """
+    roster = client.get("/players?detail=1").get_json()
+    names = [p["name"] for p in roster]
+    teams = sorted({p["team"] for p in roster})
+    rng = random.Random(args.seed)
+    counter = itertools.count()
+
+    def chat():
+        i = next(counter)
+        return client.post("/chat", json={
+            "message": CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)],
+            "thread_id": f"load-{i}",
+            "execution": args.execution,
+            "mode": args.mode,
+        })
+
+    def compare():
+        player1, player2 = rng.sample(names, 2)
+        return client.get("/compare", query_string={"player1": player1, "player2": player2})
+
+    def players():
+        return client.get("/players")
+
+    def charts():
+        return client.get(f"/api/player-efficiency/{rng.choice(teams)}")
+
+    def radar():
+        return client.get("/api/radar-chart/batch", query_string={"teams": f"{rng.choice(teams)},conference-average"})
+
+    calls = {"chat": chat, "compare": compare, "players": players, "charts": charts, "radar": radar}
+    selected = [e for e in args.endpoints.split(",") if e]
+    unknown = set(selected) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    # Warm-up, not measured
+    for endpoint in selected:
+        calls[endpoint]()
+    work = [(endpoint, calls[endpoint]) for endpoint in selected for _ in range(args.requests)]
+    rng.shuffle(work)
+    return work
+
+
+def run(work, concurrency):
+    results = defaultdict(lambda: {"latencies": [], "errors": 0})
+
+    def one(item):
+        endpoint, call = item
+        start = time.perf_counter()
+        response = call()
+        return endpoint, time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for endpoint, latency, status in pool.map(one, work):
+            results[endpoint]["latencies"].append(latency)
+            if status >= 400:
+                results[endpoint]["errors"] += 1
+    return results, time.perf_counter() - start
+
+
+def summarize(results, wall):
+    rows = {}
+    everything = []
+    for endpoint, result in results.items():
+        latencies = result["latencies"]
+        everything += latencies
+        rows[endpoint] = {
+            "requests": len(latencies),
+            "errors": result["errors"],
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    rows["all"] = {
+        "requests": len(everything),
+        "errors": sum(r["errors"] for r in results.values()),
+        "p50_ms": percentile(everything, 0.50) * 1000,
+        "p95_ms": percentile(everything, 0.95) * 1000,
+        "p99_ms": percentile(everything, 0.99) * 1000,
+        "rps": len(everything) / wall,
+    }
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM reply latency in seconds")
+    parser.add_argument("--route", default="db_query", choices=["direct_answer", "db_query"])
+    parser.add_argument("--execution", default="sync", choices=["sync", "async"])
+    parser.add_argument("--mode", default="classic", choices=["classic", "fast"])
+    parser.add_argument("--replay", metavar="FILE")
+    parser.add_argument("--record", metavar="FILE")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1")
+    parser.add_argument("--recorded-latency", action="store_true", help="replay with the recorded latency instead of --latency")
+    parser.add_argument("--chat-cache", action="store_true", help="keep the chat response cache on")
+    parser.add_argument("--no-response-cache", action="store_true", help="bypass the GET response cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    parser.add_argument("--url", help="drive a running server instead of an in-process app")
+    args = parser.parse_args()
+
+    if args.url:
+        work = build_requests(HttpClient(args.url, args.concurrency), args)
+        results, wall = run(work, args.concurrency)
+        report(args, summarize(results, wall), wall, len(work), f"server at {args.url}")
+        return
+
+    recording = Recording(args.record, args.upstream) if args.record else Recording(args.replay) if args.replay else None
+    server = serve(args.port, args.latency, args.route, agent_sql=True, recording=recording, recorded_latency=args.recorded_latency)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    if not args.chat_cache:
+        os.environ["CHAT_CACHE_ENABLED"] = "0"
+
+    import app
+    import db_cache
+    if args.no_response_cache:
+        db_cache.response_cache.maxsize = 0
+    client = app.create_app(warm_up=False).test_client()
+
+    work = build_requests(client, args)
+    results, wall = run(work, args.concurrency)
+    server.shutdown()
+    replies = "recorded" if args.record else f"replayed from {args.replay}" if args.replay else "synthetic"
+    report(args, summarize(results, wall), wall, len(work), f"{replies} LLM replies ({args.latency}s)")
+    if recording is not None and not args.record:
+        print(f"replay: {recording.hits} hits, {recording.misses} misses")
+
+
+def report(args, rows, wall, total, setup):
+    print(f"{total} requests, {args.concurrency} concurrent, {setup}, chat {args.execution}/{args.mode}, wall {wall:.2f}s")
+    print(f"{'endpoint':<10}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<10}{row['requests']:>9}{row['errors']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    print(f"throughput: {rows['all']['rps']:.1f} req/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "wall_s": wall, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,101 @@
+import json
 import os
-import sqlite3
 import pandas as pd
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request
+from database import read_connection
+from db_cache import cached_json
+from http_cache import enable_http_cache
+from ingest import PLAYER_TABLE
+from player_store import ensure_player_store
+from seasons import latest_season
 
-chart_bp = Blueprint("chart_bp", __name__)
+chart_bp = enable_http_cache(Blueprint("chart_bp", __name__))
 
 # Database path (in the same folder as the backend folder)
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
 
+# Response key -> AllPlayers column
+EFFICIENCY_FIELDS = {
+    "player": "Player Name",
+    "mpg": "Minutes/gm",
+    "ppg": "PTS/gm",
+    "apg": "Assists/gm",
+    "topg": "Turnovers/gm",
+    "spg": "STL/gm",
+    "bpg": "BLK/gm",
+    "image": "Image URL",
+}
+NUMERIC_FIELDS = ["mpg", "ppg", "apg", "topg", "spg", "bpg"]
+
+def load_player_stats(conn, team, season=None):
+    """ A team's players for one season (the team's latest by default), in roster order """
+    columns = ", ".join(f'"{c}" AS "{k}"' for k, c in EFFICIENCY_FIELDS.items())
+    season = season or latest_season(conn, PLAYER_TABLE, team)
+    return pd.read_sql_query(
+        f'SELECT {columns} FROM "{PLAYER_TABLE}" WHERE season = ? AND team = ? ORDER BY rowid',
+        conn,
+        params=(season, team),
+    )
+
+def coerce_player_stats(frame):
+    """
+    Cast the stat columns to numbers in one pass per column.
+    Returns (valid rows, invalid rows) where each invalid row records which fields
+    couldn't be converted and their raw values.
+    """
+    frame = frame.copy()
+    raw = frame[NUMERIC_FIELDS]
+    numeric = raw.apply(pd.to_numeric, errors="coerce")
+    bad = numeric.isna()
+    invalid_mask = bad.any(axis=1)
+
+    invalid = []
+    for index in invalid_mask[invalid_mask].index:
+        fields = [f for f in NUMERIC_FIELDS if bad.at[index, f]]
+        invalid.append({
+            "row": int(index),
+            "player": frame.at[index, "player"],
+            "fields": fields,
+            "values": {f: raw.at[index, f] for f in fields},
+        })
+
+    frame[NUMERIC_FIELDS] = numeric.astype(float)
+    frame[["player", "image"]] = frame[["player", "image"]].fillna("")
+    return frame[~invalid_mask].reset_index(drop=True), invalid
+
 def get_player_stats_for_team(team):
+    """ (valid rows as a DataFrame, invalid rows) for a team; empty on errors """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        query = f"""
-        SELECT 
-            "Player Name", "Minutes/gm", "PTS/gm", "Assists/gm", "Turnovers/gm", "STL/gm", "BLK/gm", "Image URL"
-        FROM "{team}_player_stats"
-        """
-        player_stats = pd.read_sql_query(query, conn)
-        player_stats = player_stats.fillna('')
-        data = []
-        for _, row in player_stats.iterrows():
-            try:
-                data.append({
-                    "player": row['Player Name'],
-                    "mpg": float(row['Minutes/gm']),
-                    "ppg": float(row['PTS/gm']),
-                    "apg": float(row['Assists/gm']),
-                    "topg": float(row['Turnovers/gm']),
-                    "spg": float(row['STL/gm']),
-                    "bpg": float(row['BLK/gm']),
-                    "image": row['Image URL']
-                })
-            except Exception as e:
-                print("Skipped row due to error:", e)
-        conn.close()
-        return data
+        ensure_player_store(DB_PATH)
+        with read_connection(DB_PATH) as conn:
+            frame = load_player_stats(conn, team, request.args.get("season"))
     except Exception as e:
         print(f"Error fetching data for team {team}:", e)
-        return []
+        return pd.DataFrame(columns=list(EFFICIENCY_FIELDS)), []
+    valid, invalid = coerce_player_stats(frame)
+    if invalid:
+        print(f"[PlayerEfficiency] {team}: {len(invalid)} row(s) with non-numeric stats left out, e.g. {invalid[:3]}")
+    return valid, invalid
+
+def player_efficiency_response(team):
+    """
+    A JSON list of player records, byte-for-byte what this endpoint has always returned
+    (jsonify: sorted keys, Flask's separators and float formatting).
+    With ?format=columnar: {"data": {field: [values...]}, "invalid_rows": [...]}.
+    """
+    valid, invalid = get_player_stats_for_team(team)
+    if request.args.get("format") == "columnar":
+        body = json.dumps({"data": valid.to_dict(orient="list"), "invalid_rows": invalid}, default=str)
+        return Response(body, mimetype="application/json")
+    # The values are already coerced, so this is a plain list of dicts of str/float
+    return jsonify(valid.to_dict(orient="records"))
 
 @chart_bp.route('/api/player-efficiency/<team>')
+@cached_json
 def player_efficiency_by_team(team):
-    data = get_player_stats_for_team(team)
-    return jsonify(data)
+    return player_efficiency_response(team)
 
 @chart_bp.route('/api/player-efficiency')
+@cached_json
 def player_efficiency():
-    data = get_player_stats_for_team('UCDavis')
-    return jsonify(data)
+    return player_efficiency_response('UCDavis')
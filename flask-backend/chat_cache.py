@@ -0,0 +1,130 @@
+"""
+Response cache for repeated chatbot questions.
+
+Answers are keyed on a normalized form of the question plus a hash of the conversation
+context before it, since a follow-up like "What about assists?" means something different
+in every conversation. Only questions asked with no prior context (the first question
+of a session) share one entry across conversations.
+
+Lookups try an exact key first and then, if enabled, a rapidfuzz match against cached
+questions with the same context. A fuzzy match only counts when the two questions
+differ in filler words alone, so "FG%" never matches "FT%" and "UC Davis" never
+matches "UC Irvine" however close the strings are. Entries expire after a TTL, the cache is LRU-bounded,
+and everything is dropped when the database version changes (see db_cache.py).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from rapidfuzz import fuzz, process
+
+from db_cache import DatabaseVersion
+
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "1") == "1"
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_MAXSIZE = int(os.getenv("CHAT_CACHE_MAXSIZE", "512"))
+CHAT_CACHE_FUZZY = os.getenv("CHAT_CACHE_FUZZY", "1") == "1"
+# Similarity threshold on rapidfuzz's 0-100 scale
+CHAT_CACHE_FUZZY_THRESHOLD = float(os.getenv("CHAT_CACHE_FUZZY_THRESHOLD", "85"))
+
+# Words that can differ between two phrasings of the same question
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "s", "was", "what", "whats", "who", "whos", "which",
+    "on", "for", "of", "in", "at", "to", "does", "do", "did", "me", "tell", "show",
+    "give", "please", "can", "you", "i", "want", "know", "current", "currently",
+}
+
+
+def normalize_question(question: str) -> str:
+    """ Case-fold, drop punctuation and collapse whitespace """
+    text = re.sub(r"[^\w%\s]", " ", str(question or "").casefold())
+    return " ".join(text.split())
+
+
+def only_filler_differs(a: str, b: str) -> bool:
+    return set(a.split()).symmetric_difference(b.split()) <= FILLER_WORDS
+
+
+def context_key(context: str) -> str:
+    """ Empty without prior context, otherwise a hash of the conversation so far """
+    if not (context or "").strip():
+        return ""
+    return hashlib.sha1(context.encode("utf-8")).hexdigest()
+
+
+class ChatResponseCache:
+    def __init__(self, maxsize=CHAT_CACHE_MAXSIZE, ttl=CHAT_CACHE_TTL_SECONDS,
+                 fuzzy=CHAT_CACHE_FUZZY, threshold=CHAT_CACHE_FUZZY_THRESHOLD, version=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.version = version or DatabaseVersion()
+        self._db_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        """ Drop every entry if the database changed since they were stored """
+        version = self.version.current()
+        if version != self._db_version:
+            self._entries.clear()
+            self._db_version = version
+
+    def _expire(self, now):
+        for key in [k for k, (stored_at, _) in self._entries.items() if now - stored_at > self.ttl]:
+            del self._entries[key]
+
+    def get(self, question: str, context: str = ""):
+        """ Return the cached value for this question/context, or None """
+        key = (normalize_question(question), context_key(context))
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self.fuzzy:
+                candidates = {
+                    k: k[0] for k in self._entries
+                    if k[1] == key[1] and only_filler_differs(k[0], key[0])
+                }
+                match = process.extractOne(key[0], candidates, scorer=fuzz.token_sort_ratio, score_cutoff=self.threshold)
+                if match is not None:
+                    matched_key = match[2]
+                    self._entries.move_to_end(matched_key)
+                    self.fuzzy_hits += 1
+                    return self._entries[matched_key][1]
+            self.misses += 1
+        return None
+
+    def put(self, question: str, context: str, value):
+        key = (normalize_question(question), context_key(context))
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits, "misses": self.misses,
+        }
+
+
+chat_response_cache = ChatResponseCache()
@@ -0,0 +1,288 @@
+"""
+Per-request tracing and Prometheus metrics for the chat pipeline.
+
+Each /chat or /chat/stream request runs inside a Trace carried by a context variable,
+so any stage can open a span without the trace being passed around:
+
+    with span("supervisor"):
+        ...
+
+or decorate a stage function with @traced("supervisor"). A span records its duration,
+plus the LLM token usage and SQL statements attributed to it by the LangChain
+callbacks (llm_callbacks() on the shared model, tool_callbacks() on SQL agent runs).
+Usage lands on the innermost open span.
+
+Context variables follow asyncio tasks automatically, but not work handed to a thread
+pool or to the shared event loop: wrap those with in_context() / with_trace().
+
+Finished spans and requests feed the Prometheus metrics served at /metrics, and
+Trace.summary() is the timing block returned in the /chat metadata. Under gunicorn
+(PROMETHEUS_MULTIPROC_DIR set, see gunicorn.conf.py) /metrics aggregates all workers.
+"""
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+
+from flask import Blueprint, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+# LangChain tool that runs the SQL agent's statements
+SQL_TOOL = "sql_db_query"
+# Label for usage recorded outside any span (e.g. background work without a trace)
+UNTRACED = "untraced"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+REQUEST_DURATION = Histogram(
+    "chat_request_duration_seconds", "Chat request latency", ["endpoint", "path"], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter("chat_requests_total", "Chat requests", ["endpoint", "path", "status"])
+STAGE_DURATION = Histogram(
+    "chat_stage_duration_seconds", "Chat pipeline stage latency", ["stage"], buckets=LATENCY_BUCKETS
+)
+LLM_CALLS = Counter("chat_llm_calls_total", "LLM calls", ["stage"])
+LLM_TOKENS = Counter("chat_llm_tokens_total", "LLM tokens", ["stage", "kind"])
+SQL_STATEMENTS = Counter("chat_sql_statements_total", "SQL statements run for chat answers", ["stage"])
+CACHE_LOOKUPS = Counter("chat_cache_lookups_total", "Chat cache lookups", ["cache", "result"])
+
+_current_trace = ContextVar("chat_trace", default=None)
+_current_span = ContextVar("chat_span", default=None)
+
+
+class Span:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.duration = None
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.sql = []
+
+    def to_dict(self, trace_start):
+        return {
+            "stage": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "start_ms": round((self.start - trace_start) * 1000, 1),
+            "ms": round((self.duration or 0) * 1000, 1),
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "sql": self.sql,
+        }
+
+
+class Trace:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.cache = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def cache_lookup(self, cache, hit):
+        result = "hit" if hit else "miss"
+        self.cache[cache] = result
+        CACHE_LOOKUPS.labels(cache, result).inc()
+
+    def finish(self, path, status):
+        """ Close the trace and record the request; path/status as in the /chat result """
+        self.duration = time.perf_counter() - self.start
+        REQUEST_DURATION.labels(self.endpoint, path or "unknown").observe(self.duration)
+        REQUESTS.labels(self.endpoint, path or "unknown", status or "success").inc()
+
+    def summary(self):
+        """ Timing block for the response metadata """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        total = self.duration if self.duration is not None else time.perf_counter() - self.start
+        return {
+            "total_ms": round(total * 1000, 1),
+            "llm_calls": sum(s.llm_calls for s in spans),
+            "prompt_tokens": sum(s.prompt_tokens for s in spans),
+            "completion_tokens": sum(s.completion_tokens for s in spans),
+            "sql_statements": sum(len(s.sql) for s in spans),
+            "cache": dict(self.cache),
+            "stages": [s.to_dict(self.start) for s in spans],
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(endpoint):
+    trace = Trace(endpoint)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name):
+    trace = _current_trace.get()
+    current = Span(name, _current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - current.start
+        STAGE_DURATION.labels(name).observe(current.duration)
+        if trace is not None:
+            trace.add_span(current)
+
+
+def traced(stage):
+    """ Run a (sync or async) stage function inside a span """
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def in_context(fn):
+    """ fn bound to a copy of the caller's context, for executor.submit() """
+    return partial(copy_context().run, fn)
+
+
+def with_trace(coro):
+    """ Wrap a coroutine so it runs under the caller's trace on another thread's event loop """
+    trace, parent = _current_trace.get(), _current_span.get()
+
+    async def run():
+        _current_trace.set(trace)
+        _current_span.set(parent)
+        return await coro
+
+    return run()
+
+
+def record_llm_usage(prompt_tokens, completion_tokens):
+    current = _current_span.get()
+    stage = current.name if current else UNTRACED
+    LLM_CALLS.labels(stage).inc()
+    LLM_TOKENS.labels(stage, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(stage, "completion").inc(completion_tokens)
+    if current is not None:
+        current.llm_calls += 1
+        current.prompt_tokens += prompt_tokens
+        current.completion_tokens += completion_tokens
+
+
+def record_sql(statement):
+    current = _current_span.get()
+    SQL_STATEMENTS.labels(current.name if current else UNTRACED).inc()
+    if current is not None:
+        current.sql.append(statement)
+
+
+def _token_usage(result):
+    """ (prompt, completion) tokens from an LLMResult, streamed or not """
+    prompt = completion = 0
+    found = False
+    for generations in result.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                found = True
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not found:
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def _callback_handler(llm, tools):
+    """ A LangChain callback handler recording LLM usage and/or SQL tool calls on the current span """
+    with _handlers_lock:
+        if (llm, tools) not in _handlers:
+            # Imported here so importing this module doesn't pull in LangChain
+            from langchain_core.callbacks import BaseCallbackHandler
+
+            class TraceCallbackHandler(BaseCallbackHandler):
+                # Run in the caller's thread/task so the current span is visible
+                run_inline = True
+
+                @property
+                def ignore_llm(self):
+                    return not llm
+
+                @property
+                def ignore_chat_model(self):
+                    return not llm
+
+                @property
+                def ignore_agent(self):
+                    return not tools
+
+                @property
+                def ignore_chain(self):
+                    return True
+
+                @property
+                def ignore_retriever(self):
+                    return True
+
+                def on_llm_end(self, response, **kwargs):
+                    record_llm_usage(*_token_usage(response))
+
+                def on_tool_start(self, serialized, input_str, *, inputs=None, **kwargs):
+                    if (serialized or {}).get("name", kwargs.get("name")) == SQL_TOOL:
+                        record_sql((inputs or {}).get("query") or input_str)
+
+            _handlers[(llm, tools)] = TraceCallbackHandler()
+        return _handlers[(llm, tools)]
+
+
+def llm_callbacks():
+    """ Callbacks for the shared chat model: token usage of every call """
+    return [_callback_handler(llm=True, tools=False)]
+
+
+def tool_callbacks():
+    """ Callbacks for SQL agent runs: the statements its tools execute """
+    return [_callback_handler(llm=False, tools=True)]
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -1,29 +1,23 @@
 import os, json
 from typing import Annotated, TypedDict, Literal, List
 from dotenv import load_dotenv
-from langchain import hub
-from flask import request, jsonify, Blueprint
+from flask import request, jsonify, Blueprint, Response, stream_with_context
 from flask_cors import CORS
 import uuid
-from langchain_openai import ChatOpenAI
 # from llm_tools import db, tools, llm, query_prompt_template
-from langgraph.prebuilt import create_react_agent
-from llm import Chatbot
-from langgraph.graph import START, StateGraph, MessagesState, END
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
-from llm_classes import State, Assistant, is_statistical_question, start_node
-from langgraph.types import Command
-from langchain.schema import AIMessage
-from sqlalchemy import create_engine, inspect
+from chat_cache import chat_response_cache, CHAT_CACHE_ENABLED
+from chat_tracing import current_trace, in_context, llm_callbacks, record_sql, span, start_trace, tool_callbacks, traced, with_trace
+from schema_catalog import schema_catalog
+from sql_fast_path import intent_matcher, run_intent
+from session_memory import SessionMemoryStore
+from llm_client import async_runner, get_http_client, get_async_http_client
+from database import get_sql_database
+from game_log import game_log_store
+import asyncio
 from datetime import datetime
-from langchain.chains import ConversationChain
-from langchain.chains.conversation.memory import ConversationBufferMemory
-from langchain.chains.conversation.memory import ConversationSummaryMemory
-from langchain_community.memory.kg import ConversationKGMemory
-from langchain_community.graphs import NetworkxEntityGraph
-from langchain.schema import HumanMessage
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
 chatbot_bp = Blueprint("chatbot_bp1", __name__)
 CORS(chatbot_bp)
@@ -37,62 +31,114 @@ def log_with_time(msg):
     print(f"{msg} [Time: {now}]")
 
 # ----- LLM and Database Setup ----- #
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3)
-
+# Nothing here runs at import time. The LangChain/OpenAI imports alone take seconds, and
+# the agent prompt comes from the LangChain hub over the network, so the model, database,
+# toolkit and prompt are built on first use (or by warm_up() in the background) and shared.
+db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ucd-basketball.db'))
 
-'''
-conversation = ConversationChain(llm=llm)
-memory = ConversationSummaryMemory(llm=llm)
+SQL_AGENT_PROMPT = "langchain-ai/sql-agent-system-prompt"
+# Vendored copy of the hub prompt, used when the hub can't be reached
+SQL_AGENT_PROMPT_FILE = os.path.join(os.path.dirname(__file__), "prompts", "sql_agent_system_prompt.txt")
+
+# langgraph.graph.END
+END = "__end__"
+
+_resources = {}
+_resources_lock = threading.RLock()
+
+def _shared(name: str, build):
+    """ Build a shared resource once, on first use """
+    value = _resources.get(name)
+    if value is None:
+        with _resources_lock:
+            value = _resources.get(name)
+            if value is None:
+                start = time.perf_counter()
+                value = _resources[name] = build()
+                log_with_time(f"[Setup] {name} ready in {time.perf_counter() - start:.2f}s")
+    return value
+
+def _build_llm():
+    from langchain_openai import ChatOpenAI
+    # Pooled clients shared by every request, for both invoke() and ainvoke() (see llm_client.py).
+    # Token usage of every call, streamed ones included, goes to the current trace span.
+    return ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3, stream_usage=True, callbacks=llm_callbacks(),
+                      http_client=get_http_client(), http_async_client=get_async_http_client())
+
+def _build_db():
+    # GameLog has to exist before SQLDatabase reflects the tables
+    game_log_store.ensure()
+    # Read-only engine shared with llm.Chatbot (see database.py)
+    db = get_sql_database(db_path)
+    try:
+        table_names = db.get_usable_table_names()
+        print("✅ DB connection successful. Tables found:", table_names)
+    except Exception as e:
+        print("❌ Failed to connect to DB:", str(e))
+    return db
 
-conversation_sum = ConversationChain(
-    llm=llm,
-    memory=ConversationSummaryMemory(llm=llm)
-)
-'''
+def _build_tools():
+    from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+    toolkit = SQLDatabaseToolkit(db=get_db(), llm=get_llm())
+    return toolkit.get_tools()
 
-# SQLITE Database Connection
-db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ucd-basketball.db'))
-db_uri = f"sqlite:///{db_path}"
-db = SQLDatabase.from_uri(db_uri)
+def _build_prompt_template():
+    """ System prompt for the SQL agent: the hub version, or the vendored copy offline """
+    try:
+        from langchain import hub
+        return hub.pull(SQL_AGENT_PROMPT)
+    except Exception as e:
+        log_with_time(f"[Setup] Couldn't pull {SQL_AGENT_PROMPT} ({e}); using the vendored prompt")
+        from langchain_core.prompts import ChatPromptTemplate
+        with open(SQL_AGENT_PROMPT_FILE, encoding="utf-8") as f:
+            return ChatPromptTemplate.from_messages([("system", f.read())])
 
-# Test DB connection
-engine = create_engine(db_uri)
-inspector = inspect(engine)
-table_names = inspector.get_table_names()
-print(table_names)
+def get_llm():
+    return _shared("llm", _build_llm)
 
+def get_db():
+    return _shared("db", _build_db)
 
-try:
-    table_names = db.get_usable_table_names()
-    print("✅ DB connection successful. Tables found:", table_names)
-except Exception as e:
-    print("❌ Failed to connect to DB:", str(e))
+def get_tools():
+    return _shared("tools", _build_tools)
 
-table_info = db.get_table_info()
+def get_prompt_template():
+    return _shared("prompt_template", _build_prompt_template)
 
-# SQL Toolkit
-toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-tools = toolkit.get_tools()
+def get_table_info() -> str:
+    """
+    Full get_table_info() text; only used to report how many tokens the schema catalog saves.
+    Not cached here: schema_catalog counts it once per database version.
+    """
+    return get_db().get_table_info()
 
 MAX_RETRIES = 3
 
+# Decomposed sub-queries run concurrently; both limits can be tuned per deployment
+MAX_QUERY_CONCURRENCY = int(os.getenv("MAX_QUERY_CONCURRENCY", "4"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "60"))
+
+
+@traced("summarize_memory")
+def summarize_memory(previous_summary: str, messages: list) -> str:
+    """ Fold messages that fell out of a session's buffer into its running summary """
+    transcript = "\n".join(f"{m['actor'].upper()}: {m['content']}" for m in messages)
+    prompt = (
+        "You are maintaining the memory of a basketball scouting chatbot conversation.\n"
+        "Update the summary below with the new messages. Keep player names, teams and stats the coach asked about. "
+        "Respond with the updated summary only, in at most 5 sentences.\n\n"
+        f"Current summary:\n{previous_summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    return get_llm().invoke(prompt).content.strip()
 
-#Create a custom memory buffer since Langchain Memory class doesnt work well
-class customMemory: 
-    def __init__(self): 
-        self.memory = []
-    
-    def add_user_message(self, message:str): 
-        self.memory.append({"actor": "human", "content": message})
-    
-    def add_ai_message(self, message:str): 
-        self.memory.append({"actor": "ai", "content": message})
-    
-    def get_context(self, limit=10) -> str: 
-        recent = self.memory[-limit:]
-        return "\n".join([f"{m['actor'].upper()}: {m['content']}" for m in recent])
+# Conversation memory is kept per thread_id (see session_memory.py)
+session_store = SessionMemoryStore(summarizer=summarize_memory)
 
-custom_memory = customMemory()
+def session_memory(data: dict):
+    """ (thread_id, memory) for a request, starting a new thread when the client didn't send one """
+    thread_id = str(data.get("thread_id") or request.args.get("thread_id") or uuid.uuid4())
+    return thread_id, session_store.get(thread_id)
 
 class State(TypedDict, total=False):
     question: str
@@ -106,18 +152,27 @@ class State(TypedDict, total=False):
     memory: str
 
 
-# Load system prompt for SQL agent
-prompt_template = hub.pull("langchain-ai/sql-agent-system-prompt")
+TEAM_LIST = [
+    "UCDavis", "CalPolySLO", "CalStateBakersfield", "CalStateFullerton",
+    "CalStateNorthridge", "LongBeachState", "UCIrvine", "UCRiverside",
+    "UCSanDiego", "UCSantaBarbara", "UniversityOfHawaii", "Conference Average"
+]
+DEFAULT_TEAMS = ["UCDavis", "Conference Average"]
+
+# "classic": supervisor -> ... -> generate_answer -> format_output, with team extraction alongside.
+# "fast": one structured call for routing + teams, and the answer is generated already formatted.
+CHAT_PIPELINE_MODE = os.getenv("CHAT_PIPELINE_MODE", "classic")
+PIPELINE_MODES = ("classic", "fast")
+# Simple stat lookups are answered from a SQL template instead of the ReAct agent
+SQL_FAST_PATH_ENABLED = os.getenv("SQL_FAST_PATH_ENABLED", "1") == "1"
+# "sync": LLM calls block the request thread, helpers run in thread pools.
+# "async": /chat runs the pipeline with ainvoke on the shared event loop (see llm_client.py).
+CHAT_EXECUTION = os.getenv("CHAT_EXECUTION", "sync")
+EXECUTION_MODES = ("sync", "async")
 
 # ----- Relevant Team Extraction Agent ----- #
-def relevant_team_extraction_agent(state: dict) -> str:
-    TEAM_LIST = [
-        "UCDavis", "CalPolySLO", "CalStateBakersfield", "CalStateFullerton",
-        "CalStateNorthridge", "LongBeachState", "UCIrvine", "UCRiverside",
-        "UCSanDiego", "UCSantaBarbara", "UniversityOfHawaii", "Conference Average"
-    ]
-
-    prompt = (
+def team_extraction_prompt(state: dict) -> str:
+    return (
         "You are a UC Davis Basketball analyst and scout. "
         "Given the following question, extract the relevant team name(s) from the question."
         "If no team is mentioned, assume the user is asking about UC Davis."
@@ -127,36 +182,71 @@ def relevant_team_extraction_agent(state: dict) -> str:
         "Output format: [\"TEAM1\", \"TEAM2\"]"
     )
 
-    response = llm.invoke(prompt)
+def _parse_teams(text: str) -> list:
     try:
-        teams = json.loads(response.content)
+        teams = json.loads(text)
         if isinstance(teams, list) and len(teams) == 2:
             return teams
     except Exception:
         pass
-    return ["UCDavis", "Conference Average"]
+    return list(DEFAULT_TEAMS)
+
+@traced("team_extraction")
+def relevant_team_extraction_agent(state: dict) -> list:
+    response = get_llm().invoke(team_extraction_prompt(state))
+    return _parse_teams(response.content)
+
+@traced("team_extraction")
+async def arelevant_team_extraction_agent(state: dict) -> list:
+    response = await get_llm().ainvoke(team_extraction_prompt(state))
+    return _parse_teams(response.content)
 
 # ---- Formatting Agent ----- #
-def format_output(text: str) -> str:
-    """
-    Ask the LLM to best format the given text for clarity and presentation.
-    """
-    fmt_prompt = (
+FORMAT_INSTRUCTIONS = (
+    "Use headings, bullet points, or tables as appropriate. Don't use bold (***text***) or italics (___text___) or headings (### Heading)."
+)
+
+def format_prompt(text: str) -> str:
+    return (
         "You are an expert content formatter. "
         "Please take the following answer and format it for clarity, readability, and presentation. "
-        "Use headings, bullet points, or tables as appropriate. Don't use bold (***text***) or italics (___text___) or headings (### Heading).\n\n"
+        f"{FORMAT_INSTRUCTIONS}\n\n"
         f"Answer:\n{text}"
     )
-    response = llm.invoke(fmt_prompt)
+
+@traced("format_output")
+def format_output(text: str) -> str:
+    """
+    Ask the LLM to best format the given text for clarity and presentation.
+    """
+    response = get_llm().invoke(format_prompt(text))
+    log_with_time(f"[FormatOutput] Formatted answer generated.")
+    return response.content
+
+@traced("format_output")
+async def aformat_output(text: str) -> str:
+    response = await get_llm().ainvoke(format_prompt(text))
     log_with_time(f"[FormatOutput] Formatted answer generated.")
     return response.content
 
+def stream_llm(prompt: str):
+    """
+    Yield the LLM's reply to a prompt token by token.
+    """
+    for chunk in get_llm().stream(prompt):
+        if chunk.content:
+            yield chunk.content
+
 # ---- Query Agent (State Graph) ----- #
 class QueryQuestionsOutput(TypedDict):
     questions: List[str]
 
-def query_decision_agent(state: dict, memory: str = "") -> QueryQuestionsOutput:
-    prompt = (
+def query_decision_prompt(state: dict, memory: str = "") -> str:
+    # Compact column catalog for the teams in this question instead of the full get_table_info()
+    schema_text, schema_report = schema_catalog.for_question(state.get("question"), memory, get_table_info)
+    state["schema_report"] = schema_report
+    log_with_time(f"[SchemaCatalog] {schema_report['tokens']} schema tokens for {schema_report['teams']} (full table info: {schema_report['full_tokens']}, saved {schema_report['saved_tokens']})")
+    return (
         "You are a UC Davis Basketball analyst and scout. Your task is to determine which database queries will provide the most useful insights based on the user's input.\n\n"
         "Guidelines:\n"
         "- If the question is a direct request for a single data point (e.g., 'Who is the leading scorer on UC Davis?'), just rephrase it slightly if needed and return it as a single query.\n"
@@ -172,9 +262,9 @@ def query_decision_agent(state: dict, memory: str = "") -> QueryQuestionsOutput:
         "– Make sure to consider both the AI's and the human's responses, not just the AI's. Understanding the full context of the conversation is important. \n"
         "- If there's no useful information in memory, proceed with the question as-is.\n\n"
         "Database usage:\n"
-        "- If a player is not found in one table, try other relevant tables. For example, if you cannot find a certain player in UCDavis_player_stats, check other player stats tables like UCIrvine_player_stats. \n"
+        "- If a player is not found in one table, try other relevant tables. AllPlayers covers every team and season; per-team tables like UCDavis_player_stats, where they still exist, only hold the latest season. \n"
         "Table info available:\n"
-        f"{table_info}\n\n"
+        f"{schema_text}\n\n"
         f"Past context (memory):\n{memory}\n\n"
         "Now, given the user question below, decide whether to return it as a single query or break it into multiple useful sub-questions. Output must follow the format shown below.\n\n"
         f"User Question:\n{state.get('question')}\n\n"
@@ -182,15 +272,26 @@ def query_decision_agent(state: dict, memory: str = "") -> QueryQuestionsOutput:
         "{ \"questions\": [\"<query question 1>\", \"<query question 2>\", ...] }"
     )
 
-    structured_llm = llm.with_structured_output(QueryQuestionsOutput)
-    result = structured_llm.invoke(prompt)
+@traced("query_decision")
+def query_decision_agent(state: dict, memory: str = "") -> QueryQuestionsOutput:
+    structured_llm = get_llm().with_structured_output(QueryQuestionsOutput)
+    result = structured_llm.invoke(query_decision_prompt(state, memory))
     log_with_time(f"[QueryDecisionAgent] Agent generated query questions: {result}")
+    return result
 
+@traced("query_decision")
+async def aquery_decision_agent(state: dict, memory: str = "") -> QueryQuestionsOutput:
+    structured_llm = get_llm().with_structured_output(QueryQuestionsOutput)
+    # Building the prompt reads the schema catalog (and counts the full table info) from SQLite
+    prompt = await asyncio.to_thread(query_decision_prompt, state, memory)
+    result = await structured_llm.ainvoke(prompt)
+    log_with_time(f"[QueryDecisionAgent] Agent generated query questions: {result}")
     return result
 
 # ---- Answer Generators ----- #
-def generate_answer(state: dict, memory: str = "") -> str:
-    prompt = f'''
+def generate_answer_prompt(state: dict, memory: str = "", formatted: bool = False) -> str:
+    format_rule = f"- Format the answer for clarity, readability, and presentation. {FORMAT_INSTRUCTIONS}\n" if formatted else ""
+    return f'''
 You are a UC Davis Basketball analyst and scout.
 
 Your task is to generate a detailed and actionable insight in response to the user's question, based on the database query results.
@@ -201,7 +302,7 @@ Your task is to generate a detailed and actionable insight in response to the us
 - Use only relevant stats from the database results to answer the question.
 - The answer should be clear, detailed, and focused on the user's intent.
 - When answering general analysis questions (like scouting reports, or who is best player), compare to baseline averages (like the conference average) to answer the question.
-Question: {state.get('question')}
+{format_rule}Question: {state.get('question')}
 
 Past context:
 {memory}
@@ -211,11 +312,20 @@ Database result:
 
 Answer:
 '''
-    response = llm.invoke(prompt)
+
+@traced("generate_answer")
+def generate_answer(state: dict, memory: str = "", formatted: bool = False) -> str:
+    response = get_llm().invoke(generate_answer_prompt(state, memory, formatted))
     log_with_time(f"[GenerateAnswer] LLM generated answer: {response}")
     return response.content
 
-def direct_answer(question: str, memory: str = "") -> str:
+@traced("generate_answer")
+async def agenerate_answer(state: dict, memory: str = "", formatted: bool = False) -> str:
+    response = await get_llm().ainvoke(generate_answer_prompt(state, memory, formatted))
+    log_with_time(f"[GenerateAnswer] LLM generated answer: {response}")
+    return response.content
+
+def direct_answer_prompt(question: str, memory: str = "", formatted: bool = False) -> str:
     prompt = (
         "You are a UC Davis Basketball analyst.\n\n"
         "Your task is to answer questions directly as a virtual scouting assistant, using context from previous interactions (provided as 'Past context') to clarify references. "
@@ -223,24 +333,40 @@ def direct_answer(question: str, memory: str = "") -> str:
         "– Make sure to consider both the AI's and the human's responses, not just the AI's. Understanding the full context of the conversation is important. \n"
         "If the user is asking about a player's statistics (e.g., points, assists, rebounds, shooting percentage), route to db_query instead of answering directly — even if the player's name is only implied in the memory.\n\n"
         "If no relevant context is found in memory, treat the question as standalone and proceed as normal.\n\n"
+    )
+    if formatted:
+        prompt += f"Format the answer for clarity, readability, and presentation. {FORMAT_INSTRUCTIONS}\n\n"
+    return prompt + (
         f"Past context:\n{memory}\n\n"
         f"Current question:\n{question}"
     )
-    response = llm.invoke(prompt)
+
+@traced("direct_answer")
+def direct_answer(question: str, memory: str = "", formatted: bool = False) -> str:
+    response = get_llm().invoke(direct_answer_prompt(question, memory, formatted))
+    log_with_time(f"[DirectAnswer] LLM generated direct answer: {response.content}")
+    return response.content
+
+@traced("direct_answer")
+async def adirect_answer(question: str, memory: str = "", formatted: bool = False) -> str:
+    response = await get_llm().ainvoke(direct_answer_prompt(question, memory, formatted))
     log_with_time(f"[DirectAnswer] LLM generated direct answer: {response.content}")
     return response.content
 
 # ----- Supervisor Agent ----- #
-def supervisor(state: dict) -> Command[Literal["direct_answer", "db_query", END]]:
-    prompt = (
+def supervisor_prompt(state: dict) -> str:
+    return (
         "You are a UC Davis Basketball analyst and scout. Based on the following question, "
         "decide whether to answer directly or to query the database for stats.\n\n"
         f'Question: {state.get("question")}\n'
         "If the question is about a comparison, stats, or trends, output \"db_query\". "
         "Otherwise, if it's a general input about non-basketball topics (like 'hi, who are you?'), output \"direct_answer\". If no further action is needed, output \"__end__\"."
     )
-    response = llm.invoke(prompt)
-    text = response.content.lower().strip()
+
+def _supervisor_command(text: str):
+    from langgraph.types import Command
+
+    text = text.lower().strip()
     if "db_query" in text:
         next_agent = "db_query"
     elif "__end__" in text:
@@ -250,74 +376,537 @@ def supervisor(state: dict) -> Command[Literal["direct_answer", "db_query", END]
     log_with_time(f"[Supervisor] Next step: {next_agent}")
     return Command(goto=next_agent)
 
+@traced("supervisor")
+def supervisor(state: dict) -> "Command[Literal['direct_answer', 'db_query', '__end__']]":
+    return _supervisor_command(get_llm().invoke(supervisor_prompt(state)).content)
+
+@traced("supervisor")
+async def asupervisor(state: dict) -> "Command[Literal['direct_answer', 'db_query', '__end__']]":
+    response = await get_llm().ainvoke(supervisor_prompt(state))
+    return _supervisor_command(response.content)
+
+# ----- Router (fast mode) ----- #
+class RouteOutput(TypedDict):
+    route: Literal["db_query", "direct_answer", "__end__"]
+    teams: List[str]
+
+def route_prompt(state: dict) -> str:
+    return (
+        "You are a UC Davis Basketball analyst and scout. For the following question, do two things.\n\n"
+        f'Question: {state.get("question")}\n\n'
+        "1. route: If the question is about a comparison, stats, or trends, output \"db_query\". "
+        "Otherwise, if it's a general input about non-basketball topics (like 'hi, who are you?'), output \"direct_answer\". If no further action is needed, output \"__end__\".\n"
+        "2. teams: Extract the two relevant team names from the question. "
+        "If no team is mentioned, assume the user is asking about UC Davis. "
+        "If only one team is mentioned, assume the other team is the conference average or UC Davis.\n"
+        f"Teams: {', '.join(TEAM_LIST)}"
+    )
+
+def _parse_route(result) -> RouteOutput:
+    result = result or {}
+    route = result.get("route") if result.get("route") in ("db_query", "direct_answer", END) else "direct_answer"
+    teams = result.get("teams")
+    if not (isinstance(teams, list) and len(teams) == 2):
+        teams = list(DEFAULT_TEAMS)
+    log_with_time(f"[Router] Next step: {route}, teams: {teams}")
+    return {"route": route, "teams": teams}
+
+@traced("router")
+def route_question(state: dict) -> RouteOutput:
+    """
+    Single structured call that replaces the supervisor and the team extraction agent.
+    """
+    structured_llm = get_llm().with_structured_output(RouteOutput)
+    return _parse_route(structured_llm.invoke(route_prompt(state)))
+
+@traced("router")
+async def aroute_question(state: dict) -> RouteOutput:
+    structured_llm = get_llm().with_structured_output(RouteOutput)
+    return _parse_route(await structured_llm.ainvoke(route_prompt(state)))
+
+# ----- SQL Agent ----- #
+_sql_agent = None
+_sql_agent_lock = threading.Lock()
+
+def build_sql_agent():
+    from langgraph.prebuilt import create_react_agent
+    system_msg = get_prompt_template().format(dialect="MySQL", top_k=5)
+    return create_react_agent(get_llm(), get_tools(), prompt=system_msg)
+
+def get_sql_agent():
+    """
+    The ReAct graph is compiled once and shared by every request. It has no
+    checkpointer, so concurrent invocations don't share any state.
+    """
+    global _sql_agent
+    if _sql_agent is None:
+        with _sql_agent_lock:
+            if _sql_agent is None:
+                _sql_agent = build_sql_agent()
+    return _sql_agent
+
+def warm_up():
+    """ Build everything the first chat request would otherwise wait for """
+    try:
+        get_sql_agent()
+        schema_catalog.full_tokens(get_table_info)
+        intent_matcher.ensure_built()
+        log_with_time("[Setup] Chatbot warm-up finished")
+    except Exception as e:
+        log_with_time(f"[Setup] Chatbot warm-up failed: {e}")
+
+def start_warm_up() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name="chatbot-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# ----- Sub-query Runner ----- #
+def _final_ai_message(result: dict):
+    from langchain_core.messages import AIMessage
+    return next((m.content for m in reversed(result['messages']) if isinstance(m, AIMessage)), None)
+
+@traced("sub_query")
+def run_sub_query(agent, question: str):
+    return _final_ai_message(agent.invoke({"messages": [{"role": "user", "content": question}]}, config={"callbacks": tool_callbacks()}))
+
+@traced("sub_query")
+async def arun_sub_query(agent, question: str):
+    return _final_ai_message(await agent.ainvoke({"messages": [{"role": "user", "content": question}]}, config={"callbacks": tool_callbacks()}))
+
+@traced("sub_queries")
+def run_sub_queries(agent, queries: List[str], max_workers: int = None, timeout: float = None):
+    """
+    Run the sub-queries concurrently in a bounded thread pool.
+    Returns (stats, errors) in the original query order. The timeout covers the whole
+    batch from submission, so queries still queued behind hung ones time out with them.
+    """
+    max_workers = max_workers or MAX_QUERY_CONCURRENCY
+    timeout = timeout or QUERY_TIMEOUT_SECONDS
+    if not queries:
+        return [], []
+
+    # Anything not done by the deadline keeps this outcome
+    outcomes = [("error", f"Error querying '{q}': timed out after {timeout:g}s") for q in queries]
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries))), thread_name_prefix="sub-query")
+    try:
+        futures = {executor.submit(in_context(run_sub_query), agent, q): i for i, q in enumerate(queries)}
+        done, _ = wait(futures, timeout=timeout)
+        for future in done:
+            i = futures[future]
+            try:
+                outcomes[i] = ("ok", future.result())
+            except Exception as e:
+                outcomes[i] = ("error", f"Error querying '{queries[i]}': {str(e)}")
+    finally:
+        # Don't block the request on timed-out queries: queued ones are cancelled and
+        # running ones finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return _collect_outcomes(queries, outcomes)
+
+@traced("sub_queries")
+async def arun_sub_queries(agent, queries: List[str], max_workers: int = None, timeout: float = None):
+    """
+    Async counterpart of run_sub_queries: the sub-queries run as coroutines, at most
+    max_workers at a time, with one timeout for the whole batch.
+    """
+    max_workers = max_workers or MAX_QUERY_CONCURRENCY
+    timeout = timeout or QUERY_TIMEOUT_SECONDS
+    if not queries:
+        return [], []
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def limited(question):
+        async with semaphore:
+            try:
+                return ("ok", await arun_sub_query(agent, question))
+            except Exception as e:
+                return ("error", f"Error querying '{question}': {str(e)}")
+
+    tasks = [asyncio.ensure_future(limited(q)) for q in queries]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    outcomes = [
+        task.result() if task in done else ("error", f"Error querying '{q}': timed out after {timeout:g}s")
+        for q, task in zip(queries, tasks)
+    ]
+    return _collect_outcomes(queries, outcomes)
+
+def _collect_outcomes(queries: List[str], outcomes: list):
+    stats, errors = [], []
+    for q, (status, value) in zip(queries, outcomes):
+        if status == "ok":
+            if value: stats.append(value)
+            log_with_time(f"Executed query '{q}': {value}")
+        else:
+            errors.append(value)
+    return stats, errors
+
 # ----- Overarching Supervisor ----- #
-def overarching_supervisor(state: dict) -> dict:
+# Team extraction only needs the question, so in classic mode it runs alongside the pipeline
+team_extraction_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="team-extraction")
+
+def _llm_answer(prompt: str, stream: bool, stage: str):
+    """ Get the LLM's reply, yielding token events when streaming. Returns the full text. """
+    with span(stage):
+        if not stream:
+            return get_llm().invoke(prompt).content
+        parts = []
+        for token in stream_llm(prompt):
+            parts.append(token)
+            yield "token", {"text": token}
+        return "".join(parts)
+
+def _formatted_answer(raw: str, stream: bool):
+    """ Format the raw answer, yielding token events when streaming. Returns the full text. """
+    if not stream:
+        return format_output(raw)
+    formatted = yield from _llm_answer(format_prompt(raw), stream, "format_output")
+    log_with_time(f"[FormatOutput] Formatted answer streamed.")
+    return formatted
+
+def _fast_path_lookup(question: str):
+    """ (intent, stats text, sql) for a simple stat lookup, or None to use the full pipeline """
+    if not SQL_FAST_PATH_ENABLED:
+        return None
+    with span("fast_path"):
+        try:
+            intent = intent_matcher.match(question)
+            if intent is None:
+                return None
+            stats_text, sql = run_intent(intent)
+            record_sql(sql)
+        except Exception as e:
+            log_with_time(f"[FastPath] Falling back to the agent: {e}")
+            return None
+    if not stats_text:
+        return None
+    log_with_time(f"[FastPath] Answered from template: {sql}")
+    return intent, stats_text, sql
+
+def _intent_teams(intent: dict) -> list:
+    teams = list(dict.fromkeys(intent["teams"]))[:2]
+    if len(teams) == 1:
+        teams.append("Conference Average")
+    return teams
+
+def pipeline_events(state: dict, stream: bool = False, mode: str = None):
+    """
+    Run the supervisor pipeline, yielding (event, payload) pairs as each stage finishes.
+    Stage events mark progress; with stream=True the answer is also yielded as "token"
+    events. The last event is always ("result", <response dict>).
+
+    In fast mode routing and team extraction come from one structured call and the
+    answer is generated already formatted, so the format_output pass is skipped.
+    Simple stat lookups skip routing and the agent entirely (see sql_fast_path.py).
+    """
+    fast = (mode or CHAT_PIPELINE_MODE) == "fast"
     try:
-        cmd = supervisor(state)
-        if cmd.goto == "direct_answer":
-            raw = direct_answer(state["question"], state["memory"])
-            formatted = format_output(raw)
-            return {"response": formatted, "path": "direct"}
-        elif cmd.goto == "db_query":
+        lookup = _fast_path_lookup(state["question"])
+        if lookup is not None:
+            # The data comes straight from SQL; the LLM only phrases it
+            intent, stats_text, sql = lookup
+            yield "stage", {"stage": "fast_path", "status": "done", "sql": sql}
+            state["relevant_stats"] = [stats_text]
+            formatted = yield from _llm_answer(generate_answer_prompt(state, state["memory"], formatted=True), stream, "generate_answer")
+            yield "result", {"response": formatted, "path": "fast_path", "status": "success", "relevant_teams": _intent_teams(intent), "metadata": {"queries_executed": 1, "successful_queries": 1, "failed_queries": 0, "sql": sql}}
+            return
+
+        teams = None
+        if fast:
+            yield "stage", {"stage": "router", "status": "started"}
+            route = route_question(state)
+            next_step, teams = route["route"], route["teams"]
+            yield "stage", {"stage": "router", "status": "done", "next": next_step, "relevant_teams": teams}
+        else:
+            yield "stage", {"stage": "supervisor", "status": "started"}
+            next_step = supervisor(state).goto
+            yield "stage", {"stage": "supervisor", "status": "done", "next": next_step}
+
+        result = None
+        if next_step == "direct_answer":
+            if fast:
+                formatted = yield from _llm_answer(direct_answer_prompt(state["question"], state["memory"], formatted=True), stream, "direct_answer")
+                log_with_time(f"[DirectAnswer] LLM generated formatted answer.")
+            else:
+                raw = direct_answer(state["question"], state["memory"])
+                yield "stage", {"stage": "direct_answer", "status": "done"}
+                formatted = yield from _formatted_answer(raw, stream)
+            result = {"response": formatted, "path": "direct"}
+        elif next_step == "db_query":
             query_spec = query_decision_agent(state, state["memory"])
             queries = query_spec.get("questions", [])
-            system_msg = prompt_template.format(dialect="MySQL", top_k=5)
-            agent = create_react_agent(llm, tools, prompt=system_msg)
-
-            stats, errors = [], []
-            for q in queries:
-                try:
-                    result = agent.invoke({"messages": [{"role": "user", "content": q}]})
-                    msg = next((m.content for m in reversed(result['messages']) if isinstance(m, AIMessage)), None)
-                    if msg: stats.append(msg)
-                    log_with_time(f"Executed query '{q}': {msg}")
-                except Exception as e:
-                    errors.append(f"Error querying '{q}': {str(e)}")
+            yield "stage", {"stage": "query_decision", "status": "done", "queries": queries, "schema": state.get("schema_report")}
+            stats, errors = run_sub_queries(get_sql_agent(), queries)
+            yield "stage", {"stage": "sub_queries", "status": "done", "successful_queries": len(stats), "failed_queries": len(errors)}
 
             state["relevant_stats"] = stats
             state["query_errors"] = errors
 
             if stats:
-                raw = generate_answer(state)
-                formatted = format_output(raw)
-                return {"response": formatted, "path": "db_query", "status": "success", "metadata": {"queries_executed": len(queries), "successful_queries": len(stats), "failed_queries": len(errors)}}
+                if fast:
+                    formatted = yield from _llm_answer(generate_answer_prompt(state, state["memory"], formatted=True), stream, "generate_answer")
+                    log_with_time(f"[GenerateAnswer] LLM generated formatted answer.")
+                else:
+                    raw = generate_answer(state, state["memory"])
+                    yield "stage", {"stage": "generate_answer", "status": "done"}
+                    formatted = yield from _formatted_answer(raw, stream)
+                result = {"response": formatted, "path": "db_query", "status": "success", "metadata": {"queries_executed": len(queries), "successful_queries": len(stats), "failed_queries": len(errors), "schema": state.get("schema_report")}}
             else:
                 log_with_time(f"All queries failed: {errors}")
-                return {"response": "I encountered issues while querying the database. Please try rephrasing your question.", "path": "db_query", "status": "error", "errors": errors}
+                result = {"response": "I encountered issues while querying the database. Please try rephrasing your question.", "path": "db_query", "status": "error", "errors": errors}
+        else:
+            result = {"response": "", "path": "end"}
+
+        if teams is not None:
+            result["relevant_teams"] = teams
+        yield "result", result
     except Exception as e:
         log_with_time(f"[OverarchingSupervisor] Unexpected error: {e}")
-        return {"response": "I apologize, but I encountered an unexpected error while processing your request.", "path": "error", "status": "error", "error": str(e)}
-
-@chatbot_bp.route('/chat', methods=['POST', 'OPTIONS'])
-def chat():
-    if request.method == "OPTIONS":
-        return jsonify({"status": "ok"}), 200
-    try:
-        data = request.json
-        user_message = data.get("message")
-        custom_memory.add_user_message(user_message)
+        yield "result", {"response": "I apologize, but I encountered an unexpected error while processing your request.", "path": "error", "status": "error", "error": str(e)}
 
-        memory = custom_memory.get_context()
+def overarching_supervisor(state: dict, mode: str = None) -> dict:
+    result = None
+    for event, payload in pipeline_events(state, mode=mode):
+        if event == "result":
+            result = payload
+    return result
 
-        print(memory)
+async def apipeline(state: dict, mode: str = None) -> dict:
+    """
+    The /chat pipeline using ainvoke throughout (see pipeline_events for the stages).
+    In classic mode team extraction runs as a concurrent task instead of on a thread.
+    """
+    fast = (mode or CHAT_PIPELINE_MODE) == "fast"
+    teams_task = None
+    try:
+        # Blocking work stays off the event loop, which serves every other async request:
+        # first-use builds, SQLite reads and any re-ingest run on a thread
+        await asyncio.to_thread(get_llm)
+        if not fast:
+            teams_task = asyncio.ensure_future(arelevant_team_extraction_agent({"question": state["question"]}))
+        result = await _apipeline_result(state, fast)
+    except Exception as e:
+        log_with_time(f"[OverarchingSupervisor] Unexpected error: {e}")
+        result = {"response": "I apologize, but I encountered an unexpected error while processing your request.", "path": "error", "status": "error", "error": str(e)}
+
+    if teams_task is not None:
+        if result.get("relevant_teams"):
+            teams_task.cancel()
+        else:
+            try:
+                result["relevant_teams"] = await teams_task
+            except Exception as e:
+                log_with_time(f"[TeamExtraction] Failed: {e}")
+                result["relevant_teams"] = list(DEFAULT_TEAMS)
+    return result
 
-        state: State = {"question": user_message, "relevant_stats": "", "result": "", "answer": "", "memory": memory}
+async def _apipeline_result(state: dict, fast: bool) -> dict:
+    lookup = await asyncio.to_thread(_fast_path_lookup, state["question"])
+    if lookup is not None:
+        intent, stats_text, sql = lookup
+        state["relevant_stats"] = [stats_text]
+        formatted = await agenerate_answer(state, state["memory"], formatted=True)
+        return {"response": formatted, "path": "fast_path", "status": "success", "relevant_teams": _intent_teams(intent), "metadata": {"queries_executed": 1, "successful_queries": 1, "failed_queries": 0, "sql": sql}}
+
+    teams = None
+    if fast:
+        route = await aroute_question(state)
+        next_step, teams = route["route"], route["teams"]
+    else:
+        next_step = (await asupervisor(state)).goto
+
+    if next_step == "direct_answer":
+        if fast:
+            formatted = await adirect_answer(state["question"], state["memory"], formatted=True)
+        else:
+            formatted = await aformat_output(await adirect_answer(state["question"], state["memory"]))
+        result = {"response": formatted, "path": "direct"}
+    elif next_step == "db_query":
+        query_spec = await aquery_decision_agent(state, state["memory"])
+        queries = query_spec.get("questions", [])
+        stats, errors = await arun_sub_queries(await asyncio.to_thread(get_sql_agent), queries)
+        state["relevant_stats"] = stats
+        state["query_errors"] = errors
+        if stats:
+            if fast:
+                formatted = await agenerate_answer(state, state["memory"], formatted=True)
+            else:
+                formatted = await aformat_output(await agenerate_answer(state, state["memory"]))
+            result = {"response": formatted, "path": "db_query", "status": "success", "metadata": {"queries_executed": len(queries), "successful_queries": len(stats), "failed_queries": len(errors), "schema": state.get("schema_report")}}
+        else:
+            log_with_time(f"All queries failed: {errors}")
+            result = {"response": "I encountered issues while querying the database. Please try rephrasing your question.", "path": "db_query", "status": "error", "errors": errors}
+    else:
+        result = {"response": "", "path": "end"}
 
-        result = overarching_supervisor(state)
+    if teams is not None:
+        result["relevant_teams"] = teams
+    return result
 
-        custom_memory.add_ai_message(result["response"])
+def _execution_mode(data: dict) -> str:
+    execution = data.get("execution") or request.args.get("execution")
+    return execution if execution in EXECUTION_MODES else CHAT_EXECUTION
+
+def _pipeline_mode(data: dict) -> str:
+    mode = data.get("mode") or request.args.get("mode")
+    return mode if mode in PIPELINE_MODES else CHAT_PIPELINE_MODE
+
+def _start_team_extraction(question: str, mode: str):
+    """ Classic mode extracts teams with a separate LLM call, started before the pipeline runs """
+    if mode == "fast":
+        return None
+    return team_extraction_executor.submit(in_context(relevant_team_extraction_agent), {"question": question})
+
+def _relevant_teams(result: dict, pending):
+    if result.get("relevant_teams"):
+        return result["relevant_teams"]
+    if pending is None:
+        return list(DEFAULT_TEAMS)
+    try:
+        return pending.result()
+    except Exception as e:
+        log_with_time(f"[TeamExtraction] Failed: {e}")
+        return list(DEFAULT_TEAMS)
+
+def _cached_response(question: str, context: str):
+    """ Answer a repeated question from the response cache without any LLM calls """
+    if not CHAT_CACHE_ENABLED or not question:
+        return None
+    cached = chat_response_cache.get(question, context)
+    trace = current_trace()
+    if trace is not None:
+        trace.cache_lookup("chat_response", cached is not None)
+    if cached is not None:
+        log_with_time(f"[ChatCache] Hit for '{question}'")
+    return cached
+
+def _store_response(question: str, context: str, result: dict, relevant_teams: list):
+    if not CHAT_CACHE_ENABLED or result.get("status") == "error" or not result.get("response"):
+        return
+    chat_response_cache.put(question, context, {"response": result["response"], "relevant_teams": relevant_teams})
 
-        answer = result["response"] if "response" in result else ""
-        
-        # Use your agent function here:
-        relevant_teams = relevant_team_extraction_agent({"question": user_message})
-        return jsonify({
-            "response": answer,
-            "relevant_teams": relevant_teams,
-            "thread_id": str(uuid.uuid4())
-        })
+@chatbot_bp.route('/chat', methods=['POST', 'OPTIONS'])
+def chat():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    try:
+        with start_trace("chat") as trace:
+            data = request.json
+            user_message = data.get("message")
+            mode = _pipeline_mode(data)
+            thread_id, conversation = session_memory(data)
+
+            prior_context = conversation.get_context()
+            cached = _cached_response(user_message, prior_context)
+            if cached is not None:
+                conversation.add_user_message(user_message)
+                conversation.add_ai_message(cached["response"])
+                session_store.maybe_summarize(conversation)
+                trace.finish("cache", "success")
+                return jsonify({**cached, "thread_id": thread_id, "cached": True, "metadata": {"timing": trace.summary()}})
+
+            execution = _execution_mode(data)
+            pending_teams = None if execution == "async" else _start_team_extraction(user_message, mode)
+            conversation.add_user_message(user_message)
+
+            memory = conversation.get_context()
+
+            print(memory)
+
+            state: State = {"question": user_message, "relevant_stats": "", "result": "", "answer": "", "memory": memory}
+
+            if execution == "async":
+                # The request thread only waits; the LLM calls share the event loop and connection pool
+                result = async_runner.run(with_trace(apipeline(state, mode)))
+            else:
+                result = overarching_supervisor(state, mode)
+
+            conversation.add_ai_message(result["response"])
+            session_store.maybe_summarize(conversation)
+
+            answer = result["response"] if "response" in result else ""
+
+            relevant_teams = _relevant_teams(result, pending_teams)
+            _store_response(user_message, prior_context, result, relevant_teams)
+            trace.finish(result.get("path"), result.get("status"))
+            return jsonify({
+                "response": answer,
+                "relevant_teams": relevant_teams,
+                "thread_id": thread_id,
+                "metadata": {**result.get("metadata", {}), "timing": trace.summary()},
+            })
     except Exception as e:
         return jsonify({
             "error": "An error occurred while processing your request",
             "details": str(e)
         }), 500
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@chatbot_bp.route('/chat/stream', methods=['GET', 'POST', 'OPTIONS'])
+def chat_stream():
+    """
+    Server-Sent Events variant of /chat. Emits "stage" events as the pipeline
+    progresses, "token" events for the answer as it is generated, then a final
+    "done" event with the same fields /chat returns (or an "error" event).
+    """
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    data = request.get_json(silent=True) or {}
+    user_message = data.get("message") or request.args.get("message")
+    if not user_message:
+        return jsonify({"error": "Missing message"}), 400
+    mode = _pipeline_mode(data)
+    thread_id, conversation = session_memory(data)
+
+    def generate():
+        with start_trace("chat_stream") as trace:
+            try:
+                prior_context = conversation.get_context()
+                cached = _cached_response(user_message, prior_context)
+                if cached is not None:
+                    conversation.add_user_message(user_message)
+                    conversation.add_ai_message(cached["response"])
+                    session_store.maybe_summarize(conversation)
+                    trace.finish("cache", "success")
+                    yield _sse("done", {**cached, "thread_id": thread_id, "cached": True, "metadata": {"timing": trace.summary()}})
+                    return
+
+                pending_teams = _start_team_extraction(user_message, mode)
+                conversation.add_user_message(user_message)
+                memory = conversation.get_context()
+                state: State = {"question": user_message, "relevant_stats": "", "result": "", "answer": "", "memory": memory}
+
+                result = {}
+                for event, payload in pipeline_events(state, stream=True, mode=mode):
+                    if event == "result":
+                        result = payload
+                    else:
+                        yield _sse(event, payload)
+
+                answer = result.get("response", "")
+                conversation.add_ai_message(answer)
+                session_store.maybe_summarize(conversation)
+                relevant_teams = _relevant_teams(result, pending_teams)
+                _store_response(user_message, prior_context, result, relevant_teams)
+                trace.finish(result.get("path"), result.get("status"))
+                yield _sse("done", {
+                    "response": answer,
+                    "relevant_teams": relevant_teams,
+                    "thread_id": thread_id,
+                    "path": result.get("path"),
+                    "status": result.get("status"),
+                    "metadata": {**result.get("metadata", {}), "timing": trace.summary()},
+                })
+            except Exception as e:
+                trace.finish("error", "error")
+                yield _sse("error", {"error": "An error occurred while processing your request", "details": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
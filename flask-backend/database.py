@@ -0,0 +1,186 @@
+"""
+Shared read-only access to the SQLite database.
+
+The blueprints used to open a new sqlite3 connection per request (and sometimes per
+table probe). Here a small thread-safe pool hands out connections that were opened
+once, read-only (mode=ro URI plus PRAGMA query_only) and tuned with mmap_size and
+cache_size, so setup stays off the request path and warm page caches are reused.
+
+Writers (ingest.py) keep using their own read-write connections. Readers see their
+commits on the next query; if the database file itself is replaced (new inode), the
+pool drops its connections and reopens against the new file. The same happens in a
+process forked after the pool was used (gunicorn workers of a preloaded app), since
+SQLite connections must not be carried across fork(); after_fork() does the same for
+the SQLAlchemy engines.
+
+The LangChain SQLDatabase used by the chatbot agents is built on the same read-only
+connection settings and shared by everything that needs one (get_sql_database()).
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB, as in PRAGMA cache_size
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))
+# Seconds to wait for a free connection once the pool is exhausted
+SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "10"))
+
+
+def connect_read_only(db_path=DB_PATH):
+    """ A tuned read-only connection; usable from any thread (the pool serializes use) """
+    conn = sqlite3.connect(f"file:{pathname2url(db_path)}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    return conn
+
+
+def _file_identity(db_path):
+    st = os.stat(db_path)
+    return (os.getpid(), st.st_dev, st.st_ino)
+
+
+class ConnectionPool:
+    def __init__(self, db_path=DB_PATH, size=SQLITE_POOL_SIZE, timeout=SQLITE_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._identity = None
+        self._lock = threading.Lock()
+
+    def _check_file(self):
+        """ Drop idle connections if the database file was replaced """
+        identity = _file_identity(self.db_path)
+        if identity == self._identity:
+            return
+        with self._lock:
+            if identity != self._identity:
+                self._close_idle()
+                self._identity = identity
+
+    def _close_idle(self):
+        while True:
+            try:
+                conn, identity = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            # Connections inherited from the parent process are only dropped
+            if identity is None or identity[0] == os.getpid():
+                conn.close()
+            self._created -= 1
+
+    def _acquire(self):
+        self._check_file()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                identity = self._identity
+                try:
+                    return connect_read_only(self.db_path), identity
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No SQLite connection free after {self.timeout:g}s (pool size {self.size})")
+
+    def _release(self, conn, identity):
+        if identity != self._identity:
+            if identity is None or identity[0] == os.getpid():
+                conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put((conn, identity))
+
+    @contextmanager
+    def connection(self):
+        """ Borrow a read-only connection for the duration of the with-block """
+        conn, identity = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn, identity)
+
+    def warm(self, count=1):
+        """ Open connections ahead of the first requests """
+        held = [self._acquire() for _ in range(min(count, self.size))]
+        for conn, identity in held:
+            self._release(conn, identity)
+
+    def close(self):
+        with self._lock:
+            self._close_idle()
+
+    def stats(self):
+        return {"size": self.size, "open": self._created, "idle": self._idle.qsize()}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH) -> ConnectionPool:
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
+
+
+def read_connection(db_path=DB_PATH):
+    """ with read_connection() as conn: ... borrows a pooled read-only connection """
+    return get_pool(db_path).connection()
+
+
+_sql_databases = {}
+
+
+def get_sql_database(db_path=DB_PATH):
+    """
+    One LangChain SQLDatabase per database file, shared by the chatbot agent and
+    llm.Chatbot. Its SQLAlchemy engine opens the same read-only tuned connections.
+    """
+    with _pools_lock:
+        if db_path not in _sql_databases:
+            from langchain_community.utilities import SQLDatabase
+            from sqlalchemy import create_engine
+            from sqlalchemy.pool import QueuePool
+
+            engine = create_engine(
+                "sqlite://",
+                creator=lambda: connect_read_only(db_path),
+                poolclass=QueuePool,
+                pool_size=SQLITE_POOL_SIZE,
+                max_overflow=0,
+                pool_pre_ping=True,
+            )
+            _sql_databases[db_path] = SQLDatabase(engine)
+        return _sql_databases[db_path]
+
+
+def after_fork():
+    """
+    Call in a forked child (gunicorn post_fork) before it serves requests. The read-only
+    pools notice the new pid by themselves; SQLAlchemy's pools have to be told to drop
+    the parent's connections without closing them.
+    """
+    with _pools_lock:
+        for sql_database in _sql_databases.values():
+            sql_database._engine.dispose(close=False)
@@ -0,0 +1,129 @@
+"""
+In-process read-through cache for JSON endpoints that only depend on the SQLite file.
+
+Cached responses are keyed on the endpoint, its URL arguments and query string, and tagged with the
+database version: the file's inode/mtime/size plus `PRAGMA data_version` from a
+long-lived connection (which changes whenever another connection commits). A cached
+body is only served while the version it was built under is still current.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+DEFAULT_MAXSIZE = 256
+
+
+class DatabaseVersion:
+    """ Cheap fingerprint of the database file, checked on every cached request """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._file_id = None
+        self._pid = os.getpid()
+        # Added to data_version so a forked worker continues the parent's numbering
+        self._offset = 0
+        self._last = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def current(self):
+        file_id = self._stat()
+        with self._lock:
+            # A connection must not be used across fork(): a worker forked from a preloading
+            # master opens its own, numbered on from the parent's last data_version so the
+            # caches built before the fork stay valid
+            forked = self._pid != os.getpid()
+            if forked or file_id != self._file_id or self._conn is None:
+                # The file was replaced or first use: reopen so data_version tracks the new file
+                if self._conn is not None and not forked:
+                    self._conn.close()
+                self._conn = None
+                self._offset = 0
+                if file_id is not None:
+                    self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    if forked and file_id == self._file_id and self._last is not None:
+                        self._offset = self._last - self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._file_id = file_id
+                self._pid = os.getpid()
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0] + self._offset if self._conn else None
+            self._last = data_version
+        return (file_id, data_version)
+
+
+class ResponseCache:
+    """ Bounded LRU of serialized responses, each tagged with the DB version it was built from """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, version=None):
+        self.maxsize = maxsize
+        self.version = version or DatabaseVersion()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        version = self.version.current()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, key, value, version):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+
+def cached_json(view):
+    """
+    Serve a view's JSON body from the response cache while the database is unchanged.
+    Only 200 responses are stored.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        cached = response_cache.get(key)
+        if cached is not None:
+            return Response(cached, status=200, mimetype="application/json")
+
+        # Tag the entry with the version seen before the view ran, so a write that lands
+        # mid-request invalidates it on the next hit instead of being masked
+        version = response_cache.version.current()
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response_cache.put(key, response.get_data(), version)
+        return response
+
+    return wrapper
@@ -0,0 +1,295 @@
+"""
+Typed game log with precomputed rolling aggregates.
+
+The scraped game logs (<team>_game_log, e.g. UC_Davis_game_log) keep scores and
+made/attempted values as strings ('79-75', '26-61') and end with two season-total rows.
+This stage parses each once into a typed GameLog table, one row per (team, game) in
+schedule order, and precomputes per game:
+
+  - points for/against, margin, made/attempted splits and percentages (0-100)
+  - the running record and the current streak (+3 = three wins in a row, -2 = two losses)
+  - rolling values over the last ROLLING_WINDOWS games up to and including that game:
+    FG% / 3PT% from the summed makes and attempts, average points for/against
+
+Early games use the games available so far (the window's games_in column says how many).
+
+GameLog is keyed by (season, team, game); the team is the table name without the
+suffix and underscores ('UC_Davis_game_log' -> 'UCDavis'). The source tables' games are
+labelled with SEASON and replaced whenever their rows change; seasons folded in by
+migrate.py (after which the source tables are dropped) are kept. Run `python game_log.py`
+to rebuild by hand.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+from db_cache import DatabaseVersion
+from seasons import SEASON, has_season
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+SOURCE_SUFFIX = "_game_log"
+GAME_TABLE = "GameLog"
+META_TABLE = "GameLog_meta"
+# Default team for the game log endpoints
+TEAM = "UCDavis"
+ROLLING_WINDOWS = (5, 10)
+# Part of the signature, so a table written with an older layout is rebuilt
+SCHEMA_VERSION = 2
+
+# Canonical column -> SQLite type
+GAME_SCHEMA = {
+    "season": "TEXT NOT NULL",
+    "team": "TEXT NOT NULL",
+    "game": "INTEGER NOT NULL",
+    "source_table": "TEXT",
+    "opponent": "TEXT NOT NULL",
+    "venue": "TEXT",
+    "result": "TEXT",
+    "points_for": "INTEGER",
+    "points_against": "INTEGER",
+    "margin": "INTEGER",
+    "fgm": "INTEGER",
+    "fga": "INTEGER",
+    "fg_pct": "REAL",
+    "fg3m": "INTEGER",
+    "fg3a": "INTEGER",
+    "fg3_pct": "REAL",
+    "ftm": "INTEGER",
+    "fta": "INTEGER",
+    "ft_pct": "REAL",
+    "off_reb": "INTEGER",
+    "def_reb": "INTEGER",
+    "reb": "INTEGER",
+    "ast": "INTEGER",
+    "tov": "INTEGER",
+    "stl": "INTEGER",
+    "blk": "INTEGER",
+    "fouls": "INTEGER",
+    "wins": "INTEGER",
+    "losses": "INTEGER",
+    "streak": "INTEGER",
+}
+for _n in ROLLING_WINDOWS:
+    GAME_SCHEMA.update({
+        f"last{_n}_games_in": "INTEGER",
+        f"last{_n}_fg_pct": "REAL",
+        f"last{_n}_fg3_pct": "REAL",
+        f"last{_n}_points_for": "REAL",
+        f"last{_n}_points_against": "REAL",
+        f"last{_n}_wins": "INTEGER",
+    })
+GAME_COLUMNS = list(GAME_SCHEMA)
+
+# GAME_SCHEMA column -> source column, for the plain integer stats
+SOURCE_COUNTS = {
+    "off_reb": "OFF",
+    "def_reb": "DEF",
+    "reb": "TOT",
+    "ast": "AST",
+    "tov": "TOs",
+    "stl": "STL",
+    "blk": "BLK",
+    "fouls": "PF",
+}
+VENUES = {"vs": "home", "at": "away"}
+
+
+def parse_pair(value):
+    """ '26-61' -> (26, 61); None for blanks and '-' """
+    match = re.fullmatch(r"\s*(\d+)\s*-\s*(\d+)\s*", str(value or ""))
+    return (int(match[1]), int(match[2])) if match else None
+
+
+def parse_opponent(value):
+    """ 'at  Idaho' -> ('away', 'Idaho'); 'vs  Menlo' -> ('home', 'Menlo') """
+    prefix, _, rest = " ".join(str(value or "").split()).partition(" ")
+    if prefix.lower() in VENUES and rest:
+        return VENUES[prefix.lower()], rest
+    return None, " ".join(str(value or "").split())
+
+
+def _pct(made, attempted):
+    return round(100 * made / attempted, 1) if attempted else None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def source_tables(conn):
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ? ESCAPE '\\' ORDER BY name",
+        ("%" + SOURCE_SUFFIX.replace("_", "\\_"),),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def team_name(table):
+    """ 'UC_Davis_game_log' -> 'UCDavis' """
+    return table.strip()[: -len(SOURCE_SUFFIX)].replace("_", "").replace(" ", "")
+
+
+def parse_games(rows, table, season=SEASON):
+    """ Source rows (dicts) -> typed game dicts, skipping rows without a score (season totals) """
+    games = []
+    for row in rows:
+        score = parse_pair(row.get("Score"))
+        if score is None:
+            continue
+        venue, opponent = parse_opponent(row.get("Opponent"))
+        points_for, points_against = score
+        fg, fg3, ft = (parse_pair(row.get(c)) or (None, None) for c in ("FGM_A", "ThreeFG_A", "FTM_A"))
+        result = (row.get("Win_Loss") or "").strip().upper() or ("W" if points_for > points_against else "L")
+        game = {
+            "season": season,
+            "team": team_name(table),
+            "game": len(games) + 1,
+            "source_table": table,
+            "opponent": opponent,
+            "venue": venue,
+            "result": result,
+            "points_for": points_for,
+            "points_against": points_against,
+            "margin": points_for - points_against,
+            "fgm": fg[0], "fga": fg[1], "fg_pct": _pct(*fg) if fg[1] else None,
+            "fg3m": fg3[0], "fg3a": fg3[1], "fg3_pct": _pct(*fg3) if fg3[1] else None,
+            "ftm": ft[0], "fta": ft[1], "ft_pct": _pct(*ft) if ft[1] else None,
+        }
+        game.update({column: _to_int(row.get(source)) for column, source in SOURCE_COUNTS.items()})
+        games.append(game)
+    return games
+
+
+def add_aggregates(games):
+    """ Running record, streak and the rolling windows, in place """
+    wins = losses = streak = 0
+    for i, game in enumerate(games):
+        won = game["result"] == "W"
+        wins, losses = wins + won, losses + (not won)
+        streak = (max(streak, 0) + 1) if won else (min(streak, 0) - 1)
+        game.update({"wins": wins, "losses": losses, "streak": streak})
+        for n in ROLLING_WINDOWS:
+            window = games[max(0, i + 1 - n): i + 1]
+            game.update({
+                f"last{n}_games_in": len(window),
+                f"last{n}_fg_pct": _pct(sum(g["fgm"] or 0 for g in window), sum(g["fga"] or 0 for g in window)),
+                f"last{n}_fg3_pct": _pct(sum(g["fg3m"] or 0 for g in window), sum(g["fg3a"] or 0 for g in window)),
+                f"last{n}_points_for": round(sum(g["points_for"] for g in window) / len(window), 1),
+                f"last{n}_points_against": round(sum(g["points_against"] for g in window) / len(window), 1),
+                f"last{n}_wins": sum(g["result"] == "W" for g in window),
+            })
+    return games
+
+
+def source_signature(conn, tables=None):
+    """ Hash of the source tables' rows, so any edit or reload triggers a rebuild """
+    tables = source_tables(conn) if tables is None else tables
+    digest = hashlib.sha1(f"schema:{SCHEMA_VERSION}".encode("utf-8"))
+    for table in tables:
+        digest.update(f"table:{table}".encode("utf-8"))
+        for row in conn.execute(f'SELECT * FROM "{table}" ORDER BY rowid'):
+            digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def create_game_table(conn):
+    """ GameLog and its indexes; a table from before seasons were added is dropped first """
+    columns = {r[1] for r in conn.execute(f'PRAGMA table_info("{GAME_TABLE}")')}
+    if columns and "season" not in columns:
+        conn.execute(f'DROP TABLE "{GAME_TABLE}"')
+    columns_sql = ", ".join(f'"{c}" {t}' for c, t in GAME_SCHEMA.items())
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{GAME_TABLE}" ({columns_sql}, PRIMARY KEY (season, team, game))')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{GAME_TABLE}_team" ON "{GAME_TABLE}" (team, season)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{GAME_TABLE}_opponent" ON "{GAME_TABLE}" (opponent)')
+
+
+def load_games(conn, table, season=SEASON):
+    cursor = conn.execute(f'SELECT * FROM "{table}" ORDER BY rowid')
+    names = [d[0] for d in cursor.description]
+    return add_aggregates(parse_games((dict(zip(names, row)) for row in cursor.fetchall()), table, season))
+
+
+def run_ingest(conn, season=SEASON, replace_migrated=False):
+    """
+    Replace the GameLog rows that come from the source tables, labelled with the given season.
+    A migrated season (source_table NULL) is only replaced with replace_migrated; see ingest.run_ingest.
+    """
+    tables = source_tables(conn)
+    by_team = {team_name(table): load_games(conn, table, season) for table in tables}
+
+    quoted = ", ".join(f'"{c}"' for c in GAME_COLUMNS)
+    placeholders = ", ".join("?" for _ in GAME_COLUMNS)
+    total = 0
+    with conn:
+        create_game_table(conn)
+        conn.execute(f'DELETE FROM "{GAME_TABLE}" WHERE source_table IS NOT NULL')
+        for team, games in by_team.items():
+            migrated = conn.execute(
+                f'SELECT COUNT(*) FROM "{GAME_TABLE}" WHERE season = ? AND team = ?', (season, team)
+            ).fetchone()[0]
+            if migrated and not replace_migrated:
+                print(f"[Ingest] {team} {season} is already migrated and was left as is; label new seasons with migrate.py --season")
+                continue
+            conn.execute(f'DELETE FROM "{GAME_TABLE}" WHERE season = ? AND team = ?', (season, team))
+            conn.executemany(
+                f'INSERT INTO "{GAME_TABLE}" ({quoted}) VALUES ({placeholders})',
+                [[g[c] for c in GAME_COLUMNS] for g in games],
+            )
+            total += len(games)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{META_TABLE}" (signature TEXT)')
+        conn.execute(f'DELETE FROM "{META_TABLE}"')
+        conn.execute(f'INSERT INTO "{META_TABLE}" (signature) VALUES (?)', (source_signature(conn, tables),))
+    print(f"Ingested {total} games from {', '.join(tables)} into {GAME_TABLE} ({season})")
+    return total
+
+
+def ingest_if_stale(db_path=DB_PATH, force=False):
+    """ Rebuild GameLog when it is missing, predates seasons or the sources changed. Returns True if rebuilt. """
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = source_tables(conn)
+        if not tables:
+            # No source tables in this database (or all migrated)
+            return False
+        try:
+            stored = conn.execute(f'SELECT signature FROM "{META_TABLE}"').fetchone()
+        except sqlite3.OperationalError:
+            stored = None
+        if force or not stored or not has_season(conn, GAME_TABLE) or stored[0] != source_signature(conn, tables):
+            run_ingest(conn)
+            return True
+        return False
+    finally:
+        conn.close()
+
+
+class GameLogStore:
+    """ Re-checks the source signature whenever the database changes """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._checked_for = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        version = self.version.current()
+        with self._lock:
+            if version != self._checked_for:
+                if ingest_if_stale(self.db_path):
+                    version = self.version.current()
+                self._checked_for = version
+
+
+game_log_store = GameLogStore()
+
+
+if __name__ == "__main__":
+    ingest_if_stale(force=True)
@@ -0,0 +1,113 @@
+from flask import Blueprint, jsonify, request
+import os
+from database import read_connection
+from db_cache import cached_json
+from game_log import GAME_TABLE, ROLLING_WINDOWS, TEAM, game_log_store
+from http_cache import enable_http_cache
+from seasons import latest_season
+
+game_log_bp = enable_http_cache(Blueprint("game_log_bp", __name__))
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+# Per-window series served by /api/game-log/rolling, without the "last<n>_" prefix
+ROLLING_FIELDS = ("games_in", "fg_pct", "fg3_pct", "points_for", "points_against", "wins")
+
+
+def load_games():
+    """
+    One team's season of GameLog rows as dicts in schedule order, ingesting first if needed.
+    ?team= defaults to UC Davis, ?season= to the team's latest season.
+    """
+    game_log_store.ensure()
+    team = request.args.get("team", TEAM)
+    with read_connection(DB_PATH) as conn:
+        season = request.args.get("season") or latest_season(conn, GAME_TABLE, team)
+        cursor = conn.execute(
+            f'SELECT * FROM "{GAME_TABLE}" WHERE season = ? AND team = ? ORDER BY game', (season, team)
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _last(games):
+    """ Apply ?last=N (the most recent N games) """
+    last = request.args.get("last", type=int)
+    return games[-last:] if last and last > 0 else games
+
+
+def _record(games):
+    wins = sum(g["result"] == "W" for g in games)
+    return {"wins": wins, "losses": len(games) - wins}
+
+
+@game_log_bp.route('/api/game-log')
+@cached_json
+def game_log():
+    """ Typed games with their running record, streak and rolling values: /api/game-log[?last=10][&team=][&season=] """
+    try:
+        games = _last(load_games())
+        if not games:
+            return jsonify({"error": "No games found"}), 404
+        return jsonify({"team": games[0]["team"], "season": games[0]["season"], "games": games})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@game_log_bp.route('/api/game-log/rolling')
+@cached_json
+def game_log_rolling():
+    """
+    One rolling window as chart-ready series, one value per game:
+    /api/game-log/rolling?window=5[&last=N]
+    """
+    window = request.args.get("window", ROLLING_WINDOWS[0], type=int)
+    if window not in ROLLING_WINDOWS:
+        return jsonify({"error": f"window must be one of {list(ROLLING_WINDOWS)}"}), 400
+    try:
+        games = _last(load_games())
+        if not games:
+            return jsonify({"error": "No games found"}), 404
+        series = {field: [g[f"last{window}_{field}"] for g in games] for field in ROLLING_FIELDS}
+        return jsonify({
+            "team": games[0]["team"],
+            "season": games[0]["season"],
+            "window": window,
+            "games": [g["game"] for g in games],
+            "opponents": [g["opponent"] for g in games],
+            "results": [g["result"] for g in games],
+            "series": series,
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@game_log_bp.route('/api/game-log/summary')
+@cached_json
+def game_log_summary():
+    """ Season record, home/away splits, streaks and the latest rolling values """
+    try:
+        games = load_games()
+        if not games:
+            return jsonify({"error": "No games found"}), 404
+        latest = games[-1]
+        return jsonify({
+            "team": latest["team"],
+            "season": latest["season"],
+            "games": len(games),
+            "record": _record(games),
+            "home": _record([g for g in games if g["venue"] == "home"]),
+            "away": _record([g for g in games if g["venue"] == "away"]),
+            "points_for": round(sum(g["points_for"] for g in games) / len(games), 1),
+            "points_against": round(sum(g["points_against"] for g in games) / len(games), 1),
+            "current_streak": latest["streak"],
+            "longest_win_streak": max(max(g["streak"] for g in games), 0),
+            "longest_losing_streak": -min(min(g["streak"] for g in games), 0),
+            "rolling": {
+                n: {field: latest[f"last{n}_{field}"] for field in ROLLING_FIELDS}
+                for n in ROLLING_WINDOWS
+            },
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for serving the backend in production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gthread workers: each worker process runs GUNICORN_THREADS request threads, which
+suits this app, where requests mostly wait on SQLite or the OpenAI API. The app is
+preloaded in the master (see wsgi.py), then each worker is warmed up after the fork.
+Tuning notes and measurements are in README.md.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(4, multiprocessing.cpu_count()))))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+# /chat runs several LLM calls in a row; keep this above QUERY_TIMEOUT_SECONDS
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to bound the in-process caches' growth (0 = never)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+
+# Aggregate the Prometheus metrics of all workers (see chat_tracing.py). This must be
+# set before the app, and with it prometheus_client, is imported in the master.
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="scoutai-metrics-")
+
+
+def post_fork(server, worker):
+    from database import after_fork
+
+    after_fork()
+
+
+def post_worker_init(worker):
+    from wsgi import warm_worker
+
+    warm_worker(worker.wsgi)
+    worker.log.info("Worker %s warmed up", worker.pid)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,91 @@
+"""
+HTTP caching for the read-only JSON endpoints (chart, radar and player blueprints).
+
+Registered as an after_request hook on each blueprint. Every successful GET JSON
+response gets:
+
+  - a strong ETag computed from the body (views that already set one keep it), and
+    a 304 Not Modified with an empty body when If-None-Match matches it
+  - Cache-Control: public, max-age=HTTP_CACHE_MAX_AGE unless the view set its own,
+    so the dashboards reuse responses across navigations and revalidate afterwards
+  - gzip for bodies of HTTP_GZIP_MIN_BYTES or more when the client accepts it. The
+    compressed variant carries its own ETag ("<etag>-gzip") and Vary: Accept-Encoding.
+
+Most bodies come out of db_cache's response cache unchanged, so compressed bodies are
+kept in a small LRU keyed on their ETag instead of being recompressed per request.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+HTTP_GZIP_MIN_BYTES = int(os.getenv("HTTP_GZIP_MIN_BYTES", "1024"))
+HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+GZIP_CACHE_SIZE = 128
+
+
+class GzipCache:
+    """ Bounded LRU of compressed bodies by ETag """
+
+    def __init__(self, maxsize=GZIP_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compress(self, etag, body):
+        with self._lock:
+            if etag in self._entries:
+                self._entries.move_to_end(etag)
+                return self._entries[etag]
+        compressed = gzip.compress(body, compresslevel=HTTP_GZIP_LEVEL, mtime=0)
+        with self._lock:
+            self._entries[etag] = compressed
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+gzip_cache = GzipCache()
+
+
+def _accepts_gzip():
+    return request.accept_encodings["gzip"] > 0
+
+
+def http_cache_headers(response):
+    """ after_request hook: ETag / 304, Cache-Control and gzip for GET JSON responses """
+    if (
+        request.method not in ("GET", "HEAD")
+        or response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    body = response.get_data()
+    etag = response.get_etag()[0] or hashlib.sha1(body).hexdigest()
+    compress = len(body) >= HTTP_GZIP_MIN_BYTES and _accepts_gzip()
+
+    response.vary.add("Accept-Encoding")
+    if "Cache-Control" not in response.headers:
+        response.headers["Cache-Control"] = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    response.set_etag(f"{etag}-gzip" if compress else etag)
+
+    # Turns the response into an empty 304 if If-None-Match matches
+    response.make_conditional(request)
+    if response.status_code == 200 and compress:
+        response.set_data(gzip_cache.compress(etag, body))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def enable_http_cache(blueprint):
+    """ Apply http_cache_headers to every response of a blueprint """
+    blueprint.after_request(http_cache_headers)
+    return blueprint
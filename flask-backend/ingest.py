@@ -0,0 +1,325 @@
+"""
+Schema-normalization ingest for the heterogeneous player stats tables.
+
+The team tables come in three layouts: the scraped per-game layout ("PTS/gm"),
+the legacy 'field*' layout whose first row holds the CSV header ("AVG.1"), and the
+raw season-totals CSV (ucd_player_stats.csv). This stage reads all of them once
+and writes a single typed AllPlayers table with per-game values precomputed and
+percentages on a 0-100 scale, so the request handlers can read columns directly.
+
+AllPlayers is keyed by (season, team, player). Rows read from the per-team tables are
+labelled with SEASON and replaced on every run; rows whose source tables were folded in
+and dropped by migrate.py (source_table NULL) are kept, so it accumulates seasons.
+
+Run `python ingest.py` to rebuild after loading new data.
+"""
+import csv
+import hashlib
+import os
+import sqlite3
+
+from seasons import SEASON, has_season
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+CSV_PATH = os.path.join(os.path.dirname(__file__), "ucd_player_stats.csv")
+CSV_TEAM = "UCDavis"
+# The season the CSV export covers; other seasons are read from the team tables alone
+CSV_SEASON = "2024-25"
+
+PLAYER_TABLE = "AllPlayers"
+META_TABLE = "AllPlayers_meta"
+# Part of the signature, so a table written with an older layout is rebuilt
+SCHEMA_VERSION = 2
+
+# Canonical column -> SQLite type
+PLAYER_SCHEMA = {
+    "Number": "INTEGER",
+    "Player Name": "TEXT NOT NULL",
+    "Games Played": "INTEGER",
+    "Games Started": "INTEGER",
+    "Minutes/gm": "REAL",
+    "FGM/gm": "REAL",
+    "FGA/gm": "REAL",
+    "FG%": "REAL",
+    "3PT Made/gm": "REAL",
+    "3PT Attempted/gm": "REAL",
+    "3PT%": "REAL",
+    "FTM/gm": "REAL",
+    "FTA/gm": "REAL",
+    "FT%": "REAL",
+    "PTS/gm": "REAL",
+    "OFF REB/gm": "REAL",
+    "DEF REB/gm": "REAL",
+    "REB/gm": "REAL",
+    "FLS/gm": "REAL",
+    "Assists/gm": "REAL",
+    "Turnovers/gm": "REAL",
+    "STL/gm": "REAL",
+    "BLK/gm": "REAL",
+    "Image URL": "TEXT",
+}
+PLAYER_COLUMNS = list(PLAYER_SCHEMA)
+PERCENT_COLUMNS = ("FG%", "3PT%", "FT%")
+
+# Season-total layouts (legacy 'field*' tables and the CSV) are keyed by header label,
+# either copied directly or divided by games played.
+TOTALS_DIRECT = {
+    "#": "Number",
+    "GP": "Games Played",
+    "GS": "Games Started",
+    "FG%": "FG%",
+    "3PT%": "3PT%",
+    "FT%": "FT%",
+    "Player Name": "Player Name",
+    "Image URL": "Image URL",
+}
+TOTALS_PER_GAME = {
+    "TOT": "Minutes/gm",
+    "FGM": "FGM/gm",
+    "FGA": "FGA/gm",
+    "3PT": "3PT Made/gm",
+    "3PTA": "3PT Attempted/gm",
+    "FTM": "FTM/gm",
+    "FTA": "FTA/gm",
+    "PTS": "PTS/gm",
+    "OFF": "OFF REB/gm",
+    "DEF": "DEF REB/gm",
+    "TOT.1": "REB/gm",
+    "PF": "FLS/gm",
+    "AST": "Assists/gm",
+    "TO": "Turnovers/gm",
+    "STL": "STL/gm",
+    "BLK": "BLK/gm",
+}
+TOTALS_SKIP_ROWS = ("Player", "Total", "Opponents", "TM", "TM Team", "")
+
+
+def canonical_name(name):
+    """ 'Johnson, TY' -> 'TY Johnson'; other names are returned with whitespace collapsed """
+    name = " ".join(str(name or "").split())
+    if name.count(",") == 1:
+        last, first = (part.strip() for part in name.split(","))
+        if first and last:
+            return f"{first} {last}"
+    return name
+
+
+def name_key(name):
+    """ Case-folded, order-normalized form of a player name used for lookups """
+    return canonical_name(name).casefold()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _coerce(player):
+    """ Cast a raw row onto the canonical column types """
+    out = {}
+    for col, sql_type in PLAYER_SCHEMA.items():
+        value = player.get(col)
+        if sql_type.startswith("INTEGER"):
+            out[col] = _to_int(value)
+        elif sql_type == "REAL":
+            out[col] = _to_float(value)
+        else:
+            out[col] = str(value).strip() if value not in (None, "") else None
+    return out
+
+
+def _scale_percentages(players):
+    """ Some sources store shooting percentages as fractions (0.389), others as 38.9 """
+    for col in PERCENT_COLUMNS:
+        values = [p[col] for p in players if p[col] is not None]
+        if values and max(values) <= 1:
+            for p in players:
+                if p[col] is not None:
+                    p[col] = round(p[col] * 100, 1)
+    return players
+
+
+def _from_totals(labelled_rows):
+    """ Convert season-total rows (header label -> value) into per-game rows """
+    players = []
+    for row in labelled_rows:
+        if (row.get("Player") or "").strip() in TOTALS_SKIP_ROWS:
+            continue
+        player = {col: row.get(label) for label, col in TOTALS_DIRECT.items() if label in row}
+        if not player.get("Player Name"):
+            player["Player Name"] = canonical_name(row.get("Player"))
+        games = _to_float(player.get("Games Played"))
+        for label, col in TOTALS_PER_GAME.items():
+            total = _to_float(row.get(label))
+            player[col] = round(total / games, 2) if total is not None and games else None
+        players.append(player)
+    return players
+
+
+def load_csv_players(path=CSV_PATH):
+    """ Season totals exported from the stats site; duplicate header labels get a .1/.2 suffix """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        seen = {}
+        labels = []
+        for label in header:
+            labels.append(f"{label}.{seen[label]}" if label in seen else label)
+            seen[label] = seen.get(label, 0) + 1
+        return _from_totals(dict(zip(labels, row)) for row in reader)
+
+
+def _legacy_players(rows):
+    header = next((r for r in rows if r.get("field1") == "#"), None)
+    if header is None:
+        return []
+    return _from_totals({header[field]: value for field, value in r.items() if header.get(field)} for r in rows if r is not header)
+
+
+def source_tables(conn):
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%\\_player\\_stats%' ESCAPE '\\' ORDER BY name"
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def team_name(table):
+    """ 'UCRiverside_player_stats ' -> 'UCRiverside' """
+    return table.strip()[: -len("_player_stats")]
+
+
+def load_table_players(conn, table):
+    cursor = conn.execute(f'SELECT * FROM "{table}"')
+    columns = [c[0] for c in cursor.description]
+    rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+    if "Player Name" not in columns:
+        return _legacy_players(rows)
+    return rows
+
+
+def _merge(players, extra):
+    """ Fill gaps in the table rows from another source for the same player """
+    by_key = {name_key(p["Player Name"]): p for p in players}
+    by_number = {p["Number"]: p for p in players if p["Number"] is not None}
+    for row in extra:
+        # Names are not always written the same way in both sources, so fall back to the jersey number
+        target = by_key.get(name_key(row["Player Name"])) or by_number.get(row["Number"])
+        if target is None:
+            players.append(row)
+            by_key[name_key(row["Player Name"])] = row
+            continue
+        for col, value in row.items():
+            if target.get(col) is None:
+                target[col] = value
+    return players
+
+
+def source_signature(conn, tables=None):
+    """ Hash of the team tables' rows and the CSV, so any edit or reload triggers a rebuild """
+    tables = source_tables(conn) if tables is None else tables
+    digest = hashlib.sha1(f"schema:{SCHEMA_VERSION}".encode("utf-8"))
+    for table in tables:
+        digest.update(f"table:{table}".encode("utf-8"))
+        for row in conn.execute(f'SELECT * FROM "{table}" ORDER BY rowid'):
+            digest.update(repr(row).encode("utf-8"))
+    if os.path.exists(CSV_PATH):
+        with open(CSV_PATH, "rb") as f:
+            digest.update(b"csv:" + f.read())
+    return digest.hexdigest()
+
+
+def create_player_table(conn):
+    """ AllPlayers and its indexes; a table from before seasons were added is dropped first """
+    columns = {r[1] for r in conn.execute(f'PRAGMA table_info("{PLAYER_TABLE}")')}
+    if columns and "season" not in columns:
+        conn.execute(f'DROP TABLE "{PLAYER_TABLE}"')
+    columns_sql = ", ".join(f'"{c}" {t}' for c, t in PLAYER_SCHEMA.items())
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{PLAYER_TABLE}" (season TEXT NOT NULL, team TEXT NOT NULL, source_table TEXT, '
+        f'name_key TEXT NOT NULL, {columns_sql}, UNIQUE (season, team, name_key))'
+    )
+    # Player lookups (latest season first) and team rosters; the UNIQUE key covers season listings
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{PLAYER_TABLE}_name_key" ON "{PLAYER_TABLE}" (name_key, season)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{PLAYER_TABLE}_team" ON "{PLAYER_TABLE}" (team, season)')
+
+
+def run_ingest(conn, season=SEASON, replace_migrated=False):
+    """
+    Replace the AllPlayers rows that come from the team tables (plus the CSV, for
+    CSV_SEASON only) with a fresh read, labelled with the given season.
+
+    Migrated rows (source_table NULL) for the same (season, team, player) are left alone
+    unless replace_migrated is set: an automatic run between scraping a new season and
+    migrating it would otherwise overwrite last season under the default label.
+    """
+    tables = source_tables(conn)
+    csv_players = [_coerce(p) for p in load_csv_players()] if season == CSV_SEASON else []
+
+    rows = []
+    for table in tables:
+        team = team_name(table)
+        players = _scale_percentages([_coerce(p) for p in load_table_players(conn, table)])
+        players = [p for p in players if p["Player Name"]]
+        if team == CSV_TEAM and csv_players:
+            players = _merge(players, _scale_percentages(csv_players))
+        for p in players:
+            rows.append([season, team, table, name_key(p["Player Name"])] + [p[c] for c in PLAYER_COLUMNS])
+
+    quoted = ", ".join(f'"{c}"' for c in PLAYER_COLUMNS)
+    placeholders = ", ".join("?" for _ in range(len(PLAYER_COLUMNS) + 4))
+    with conn:
+        create_player_table(conn)
+        conn.execute(f'DELETE FROM "{PLAYER_TABLE}" WHERE source_table IS NOT NULL')
+        if not replace_migrated:
+            migrated = set(conn.execute(
+                f'SELECT season, team, name_key FROM "{PLAYER_TABLE}" WHERE source_table IS NULL AND season = ?', (season,)
+            ).fetchall())
+            kept = [r for r in rows if (r[0], r[1], r[3]) not in migrated]
+            if len(kept) < len(rows):
+                print(
+                    f"[Ingest] {len(rows) - len(kept)} players are already migrated for {season} and were left as is; "
+                    "label new seasons with migrate.py --season"
+                )
+            rows = kept
+        conn.executemany(
+            f'INSERT OR REPLACE INTO "{PLAYER_TABLE}" (season, team, source_table, name_key, {quoted}) VALUES ({placeholders})',
+            rows,
+        )
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{META_TABLE}" (signature TEXT)')
+        conn.execute(f'DELETE FROM "{META_TABLE}"')
+        conn.execute(f'INSERT INTO "{META_TABLE}" (signature) VALUES (?)', (source_signature(conn, tables),))
+    print(f"Ingested {len(rows)} players from {len(tables)} tables into {PLAYER_TABLE} ({season})")
+    return len(rows)
+
+
+def ingest_if_stale(db_path=DB_PATH, force=False):
+    """
+    Rebuild AllPlayers when it is missing, was written before seasons were added,
+    or any source changed. Returns True if rebuilt.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            stored = conn.execute(f'SELECT signature FROM "{META_TABLE}"').fetchone()
+        except sqlite3.OperationalError:
+            stored = None
+        if force or not stored or not has_season(conn, PLAYER_TABLE) or stored[0] != source_signature(conn):
+            run_ingest(conn)
+            return True
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    ingest_if_stale(force=True)
@@ -5,6 +5,7 @@ from langchain_openai import ChatOpenAI
 from langchain_community.utilities import SQLDatabase
 from langchain import hub
 from dotenv import load_dotenv
+from database import get_sql_database
 from typing import Annotated
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
@@ -162,8 +163,7 @@ class Chatbot:
 
         #NEW SQLITE DATABASE CONNECTION
         db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
-        db_uri = f"sqlite:///{db_path}"
-        self.db = SQLDatabase.from_uri(db_uri)
+        self.db = get_sql_database(db_path)
         
         # Set up tools
         toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
@@ -0,0 +1,76 @@
+"""
+Shared HTTP clients and event loop for the OpenAI calls.
+
+ChatOpenAI builds its own httpx clients unless it's given some, so every model instance
+used to open its own connections. The clients here are created once per process with
+bounded connection pools and keep-alive, and are passed to the chat model for both
+invoke() and ainvoke().
+
+Async calls run on one long-lived event loop in a background thread (AsyncRunner).
+httpx.AsyncClient is bound to the loop it is first used on, so sharing the pool across
+requests needs a single loop rather than asyncio.run() per request. Request threads
+submit coroutines with async_runner.run() and all their LLM traffic is multiplexed on
+that loop.
+
+Set OPENAI_BASE_URL to point the clients at another OpenAI-compatible server, e.g.
+benchmarks/fake_openai_server.py.
+"""
+import asyncio
+import os
+import threading
+
+import httpx
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_HTTP_MAX_CONNECTIONS, max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE)
+
+
+def get_http_client() -> httpx.Client:
+    """ Pooled client for synchronous LLM calls """
+    with _clients_lock:
+        if "sync" not in _clients:
+            _clients["sync"] = httpx.Client(limits=_limits(), timeout=LLM_HTTP_TIMEOUT_SECONDS)
+        return _clients["sync"]
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """ Pooled client for async LLM calls; only use it from async_runner's loop """
+    with _clients_lock:
+        if "async" not in _clients:
+            _clients["async"] = httpx.AsyncClient(limits=_limits(), timeout=LLM_HTTP_TIMEOUT_SECONDS)
+        return _clients["async"]
+
+
+class AsyncRunner:
+    """ An event loop running in a daemon thread, shared by every request """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro):
+        """ Schedule a coroutine on the shared loop; returns a concurrent.futures.Future """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro, timeout=None):
+        """ Run a coroutine on the shared loop and wait for its result """
+        return self.submit(coro).result(timeout)
+
+
+async_runner = AsyncRunner()
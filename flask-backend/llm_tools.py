@@ -99,10 +99,12 @@ graph_builder = StateGraph(State).add_sequence(
 graph_builder.add_edge(START, "write_query")
 graph = graph_builder.compile()
 
-for step in graph.stream(
-    {"question": "How many players on the ucsb men's basketball team are there?"}, stream_mode="updates"
-):
-    print(step)
+# Smoke test; only when run directly, never on import
+if __name__ == "__main__":
+    for step in graph.stream(
+        {"question": "How many players on the ucsb men's basketball team are there?"}, stream_mode="updates"
+    ):
+        print(step)
 
 
 # question = "Who's the leading scorer on UC Santa Barbara, and how many points?"
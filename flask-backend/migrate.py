@@ -0,0 +1,113 @@
+"""
+Migrate the per-team / per-season tables into the long-format layout.
+
+The scraped data arrives as one table per team (<team>_player_stats, <team>_game_log),
+so every team or season loaded adds tables that the prompts, the roster and the lookups
+have to cover. This folds them into the tables keyed by season:
+
+    <team>_player_stats, ucd_player_stats.csv  -> AllPlayers (season, team, player)
+    <team>_game_log (UC_Davis_game_log)        -> GameLog (season, team, game)
+    TeamStats                                  gets a season column, unique with team
+
+and then drops the per-team tables. Rows already in AllPlayers / GameLog from earlier
+seasons are kept, so loading a new season is: scrape into the per-team tables, then
+run this with that season's label (with the app stopped in between, so it doesn't ingest
+the new tables under the default SEASON first). The database is backed up first.
+
+Usage (from flask-backend/):
+    python migrate.py [--season 2024-25] [--dry-run] [--no-backup] [--db path/to.db]
+"""
+import argparse
+import sqlite3
+
+import game_log
+import ingest
+from seasons import SEASON, has_season
+
+TEAM_TABLE = "TeamStats"
+
+
+def table_names(conn):
+    return [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")]
+
+
+def plan(conn):
+    """ The per-team tables to fold in and drop, and whether TeamStats has rows without a season """
+    tables = table_names(conn)
+    legacy = ingest.source_tables(conn) + game_log.source_tables(conn)
+    team_stats = TEAM_TABLE in tables and (
+        not has_season(conn, TEAM_TABLE)
+        or conn.execute(f'SELECT 1 FROM "{TEAM_TABLE}" WHERE season IS NULL LIMIT 1').fetchone() is not None
+    )
+    return legacy, team_stats
+
+
+def migrate(conn, season):
+    """ Fold the per-team tables into the long-format ones under the given season and drop them """
+    legacy, _ = plan(conn)
+    if ingest.source_tables(conn):
+        ingest.run_ingest(conn, season, replace_migrated=True)
+    if game_log.source_tables(conn):
+        game_log.run_ingest(conn, season, replace_migrated=True)
+
+    with conn:
+        # Rows with a source_table are replaced by the next ingest run; these now stand alone
+        for table in (ingest.PLAYER_TABLE, game_log.GAME_TABLE):
+            if table in table_names(conn):
+                conn.execute(f'UPDATE "{table}" SET source_table = NULL WHERE source_table IS NOT NULL')
+        if TEAM_TABLE in table_names(conn):
+            if not has_season(conn, TEAM_TABLE):
+                conn.execute(f'ALTER TABLE "{TEAM_TABLE}" ADD COLUMN season TEXT')
+            # Re-scraped rows for a season replace the ones already labelled with it
+            conn.execute(
+                f'DELETE FROM "{TEAM_TABLE}" WHERE season = ? AND team IN (SELECT team FROM "{TEAM_TABLE}" WHERE season IS NULL)',
+                (season,),
+            )
+            # Keep the latest row of any (season, team) written twice, so the key can be unique
+            conn.execute(
+                f'DELETE FROM "{TEAM_TABLE}" WHERE rowid NOT IN (SELECT MAX(rowid) FROM "{TEAM_TABLE}" GROUP BY season, team)'
+            )
+            conn.execute(f'UPDATE "{TEAM_TABLE}" SET season = ? WHERE season IS NULL', (season,))
+            conn.execute(f'DROP INDEX IF EXISTS "idx_{TEAM_TABLE}_season"')
+            conn.execute(f'CREATE UNIQUE INDEX "idx_{TEAM_TABLE}_season" ON "{TEAM_TABLE}" (season, team)')
+        for table in legacy:
+            conn.execute(f'DROP TABLE "{table}"')
+        # The ingest signature now describes the (empty) set of per-team tables
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{ingest.META_TABLE}" (signature TEXT)')
+        conn.execute(f'DELETE FROM "{ingest.META_TABLE}"')
+        conn.execute(f'INSERT INTO "{ingest.META_TABLE}" (signature) VALUES (?)', (ingest.source_signature(conn),))
+    conn.execute("VACUUM")
+    return legacy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--season", default=SEASON, help="season label for the data in the per-team tables")
+    parser.add_argument("--db", default=ingest.DB_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+    parser.add_argument("--no-backup", action="store_true")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        before = table_names(conn)
+        legacy, team_stats = plan(conn)
+        print(f"{args.db}: {len(before)} tables")
+        print(f"Fold into the long-format tables as season {args.season} and drop: {', '.join(legacy) or 'none'}")
+        if team_stats:
+            print(f"Label the {TEAM_TABLE} rows without a season")
+        if args.dry_run or not (legacy or team_stats):
+            return
+        if not args.no_backup:
+            backup = f"{args.db}.pre-migrate.bak"
+            with sqlite3.connect(backup) as target:
+                conn.backup(target)
+            print(f"Backed up to {backup}")
+        migrate(conn, args.season)
+        print(f"Done: {len(table_names(conn))} tables ({', '.join(table_names(conn))})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,258 +1,107 @@
 import os
-import pandas as pd
-import sqlite3
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from database import read_connection
+from http_cache import enable_http_cache
+from ingest import PLAYER_COLUMNS
+from player_store import ensure_player_store, fetch_players
+from roster_index import roster_index
 
-player_bp = Blueprint("player_bp", __name__)
+player_bp = enable_http_cache(Blueprint("player_bp", __name__))
 
 # Database path (root directory)
 DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
 
-# Helper to fetch player stats from the correct table
-# Assumes all player stats are in a table called 'AllPlayers' with columns matching the new schema
-# If you have separate tables per team, adjust accordingly
+# Helpers to fetch player stats from the unified AllPlayers table (built by ingest.py),
+# which combines every team and season and is indexed on the case-folded name.
+# ?season= picks a season; by default each player's latest one is used.
+
+def fetch_player_rows(*player_names, columns=None):
+    ensure_player_store(DB_PATH)
+    with read_connection(DB_PATH) as conn:
+        return fetch_players(conn, list(player_names), columns, season=request.args.get("season"))
 
 def fetch_player_row(player_name):
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        # Find which table contains the player
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_player_stats'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        # Try to find the player in any team table
-        for table in tables:
-            try:
-                # Try new schema first
-                try:
-                    df = pd.read_sql_query(
-                        f'SELECT * FROM "{table}" WHERE "Player Name" = ? COLLATE NOCASE', 
-                        conn, 
-                        params=(player_name,)
-                    )
-                except:
-                    # Fall back to original schema
-                    df = pd.read_sql_query(
-                        f"SELECT * FROM {table} WHERE field2 = ? COLLATE NOCASE", 
-                        conn, 
-                        params=(player_name,)
-                    )
-                    
-                if not df.empty:
-                    print(f"Found {player_name} in {table}")
-                    return df.iloc[0].to_dict()
-            except Exception as e:
-                print(f"Error searching for {player_name} in {table}: {e}")
-    finally:
-        conn.close()
-    return None
+    return fetch_player_rows(player_name)[player_name]
+
+# AllPlayers is typed and already per-game (see ingest.py), so the response fields
+# map straight onto its columns
+PER_GAME_FIELDS = {
+    "PPG": "PTS/gm",
+    "APG": "Assists/gm",
+    "RPG": "REB/gm",
+}
+PERCENTAGE_FIELDS = {
+    "FG%": "FG%",
+    "3P%": "3PT%",
+}
+COMPARISON_FIELDS = {
+    "PPG": "PTS/gm",
+    "MPG": "Minutes/gm",
+    "RPG": "REB/gm",
+    "APG": "Assists/gm",
+    "SPG": "STL/gm",
+    "BPG": "BLK/gm",
+    "TOPG": "Turnovers/gm",
+}
+
+# Fields /compare_many accepts: the response names used above, or any AllPlayers column
+STAT_FIELDS = {**COMPARISON_FIELDS, **PER_GAME_FIELDS, **PERCENTAGE_FIELDS, "FT%": "FT%"}
+STAT_FIELDS.update({c: c for c in PLAYER_COLUMNS if c not in ("Player Name", "Image URL")})
+MAX_COMPARE_PLAYERS = 25
+
+def _stat(player_data, column):
+    value = player_data.get(column)
+    return value if value is not None else "N/A"
 
 def extract_per_game_stats(player_data):
     def format_percentage(value):
-        """ Convert decimal to percentage format (e.g., 0.5 → 50%) """
-        return f"{round(value * 100, 1)}%" if isinstance(value, (int, float)) else "N/A"
-    
-    # Debug the keys in player_data
-    print(f"Player data keys: {list(player_data.keys())}")
-    
-    # Try to handle both old and new schema
-    result = {}
-    
-    # Points per game
-    if "PTS/gm" in player_data:
-        result["PPG"] = player_data["PTS/gm"]
-    elif "AVG.1" in player_data:
-        result["PPG"] = player_data["AVG.1"]
-    elif "field17" in player_data:
-        result["PPG"] = player_data["field17"]
-    else:
-        result["PPG"] = "N/A"
-    
-    # Assists per game
-    if "Assists/gm" in player_data:
-        result["APG"] = player_data["Assists/gm"]
-    else:
-        # Try to calculate from total assists and games played
-        try:
-            assists = player_data.get("AST", player_data.get("field15", 0))
-            games = player_data.get("GP", player_data.get("field3", 0))
-            if games and assists:
-                result["APG"] = round(float(assists) / float(games), 1)
-            else:
-                result["APG"] = "N/A"
-        except:
-            result["APG"] = "N/A"
-    
-    # Rebounds per game
-    if "REB/gm" in player_data:
-        result["RPG"] = player_data["REB/gm"]
-    elif "AVG.2" in player_data:
-        result["RPG"] = player_data["AVG.2"]
-    elif "field19" in player_data:
-        result["RPG"] = player_data["field19"]
-    else:
-        result["RPG"] = "N/A"
-    
-    # Field goal percentage
-    if "FG%" in player_data:
-        result["FG%"] = format_percentage(player_data["FG%"])
-    elif "field9" in player_data:
-        result["FG%"] = format_percentage(player_data["field9"])
-    else:
-        result["FG%"] = "N/A"
-    
-    # 3-point percentage
-    if "3PT%" in player_data:
-        result["3P%"] = format_percentage(player_data["3PT%"])
-    elif "field12" in player_data:
-        result["3P%"] = format_percentage(player_data["field12"])
-    else:
-        result["3P%"] = "N/A"
-    
+        """ Format a 0-100 percentage (e.g., 38.9 → 38.9%) """
+        return f"{round(value, 1)}%" if value is not None else "N/A"
+
+    result = {field: _stat(player_data, column) for field, column in PER_GAME_FIELDS.items()}
+    for field, column in PERCENTAGE_FIELDS.items():
+        result[field] = format_percentage(player_data.get(column))
     return result
 
 def extract_comparison_stats(player_data):
-    # Debug the keys
-    print(f"Player data keys for comparison: {list(player_data.keys())}")
-    
-    result = {}
-    
-    # Points per game
-    if "PTS/gm" in player_data:
-        result["PPG"] = player_data["PTS/gm"]
-    elif "AVG.1" in player_data:
-        result["PPG"] = player_data["AVG.1"]
-    elif "field17" in player_data:
-        result["PPG"] = player_data["field17"]
-    else:
-        result["PPG"] = "N/A"
-    
-    # Player image URL
-    if 'Image URL' in player_data:
-        result["imageUrl"] = player_data["Image URL"]
-    elif "image_url" in player_data:
-        result["imageUrl"] = player_data["image_url"]
-    elif "field30" in player_data:  # Adjust field number as needed
-        result["imageUrl"] = player_data["field30"]
-    else:
-        result["imageUrl"] = None
-    
-    # Minutes per game
-    if "Minutes/gm" in player_data:
-        result["MPG"] = player_data["Minutes/gm"]
-    elif "AVG" in player_data:
-        result["MPG"] = player_data["AVG"]
-    elif "field6" in player_data:
-        result["MPG"] = player_data["field6"]
-    else:
-        result["MPG"] = "N/A"
-    
-    # Rebounds per game
-    if "REB/gm" in player_data:
-        result["RPG"] = player_data["REB/gm"]
-    elif "AVG.2" in player_data:
-        result["RPG"] = player_data["AVG.2"]
-    elif "field19" in player_data:
-        result["RPG"] = player_data["field19"]
-    else:
-        result["RPG"] = "N/A"
-    
-    # Assists per game
-    if "Assists/gm" in player_data:
-        result["APG"] = player_data["Assists/gm"]
-    else:
-        # Try to calculate from total assists and games played
-        try:
-            assists = player_data.get("AST", player_data.get("field15", 0))
-            games = player_data.get("GP", player_data.get("field3", 0))
-            if games and assists:
-                result["APG"] = round(float(assists) / float(games), 1)
-            else:
-                result["APG"] = "N/A"
-        except:
-            result["APG"] = "N/A"
-    
-    # Steals per game
-    if "STL/gm" in player_data:
-        result["SPG"] = player_data["STL/gm"]
-    else:
-        # Try to calculate from total steals and games played
-        try:
-            steals = player_data.get("STL", player_data.get("field23", 0))
-            games = player_data.get("GP", player_data.get("field3", 0))
-            if games and steals:
-                result["SPG"] = round(float(steals) / float(games), 1)
-            else:
-                result["SPG"] = "N/A"
-        except:
-            result["SPG"] = "N/A"
-    
-    # Blocks per game
-    if "BLK/gm" in player_data:
-        result["BPG"] = player_data["BLK/gm"]
-    else:
-        # Try to calculate from total blocks and games played
-        try:
-            blocks = player_data.get("BLK", player_data.get("field24", 0))
-            games = player_data.get("GP", player_data.get("field3", 0))
-            if games and blocks:
-                result["BPG"] = round(float(blocks) / float(games), 1)
-            else:
-                result["BPG"] = "N/A"
-        except:
-            result["BPG"] = "N/A"
-    
-    # Turnovers per game
-    if "Turnovers/gm" in player_data:
-        result["TOPG"] = player_data["Turnovers/gm"]
-    else:
-        # Try to calculate from total turnovers and games played
-        try:
-            turnovers = player_data.get("TO", player_data.get("field22", 0))
-            games = player_data.get("GP", player_data.get("field3", 0))
-            if games and turnovers:
-                result["TOPG"] = round(float(turnovers) / float(games), 1)
-            else:
-                result["TOPG"] = "N/A"
-        except:
-            result["TOPG"] = "N/A"
-    
+    result = {field: _stat(player_data, column) for field, column in COMPARISON_FIELDS.items()}
+    result["imageUrl"] = player_data.get("Image URL")
     return result
 
 @player_bp.route("/players", methods=["GET"])
 def get_players():
-    conn = sqlite3.connect(DB_PATH)
+    """
+    Every player name in AllPlayers (all ingested teams, latest season), sorted.
+    ?detail=1 returns [{"name", "team", "key"}] instead.
+    Served from the roster index with an ETag; a matching If-None-Match gets a 304.
+    """
     try:
-        # Get a list of all tables that end with _player_stats
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_player_stats'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        all_players = []
-        # For each team table, extract players
-        for table in tables:
-            # Different column name based on your schema (adjust as needed)
-            try:
-                # Try both "Player Name" and "field2" (original schema)
-                try:
-                    df = pd.read_sql_query(f'SELECT DISTINCT "Player Name" as player FROM "{table}"', conn)
-                    players = df["player"].dropna().tolist()
-                except:
-                    # Fall back to the original schema
-                    df = pd.read_sql_query(f"SELECT DISTINCT field2 as player FROM {table} WHERE field2 NOT IN ('Player', 'Total', 'Opponents', 'TM', '')", conn)
-                    players = df["player"].dropna().tolist()
-                
-                all_players.extend(players)
-            except Exception as e:
-                print(f"Error getting players from {table}: {e}")
-        
-        # Remove duplicates and sort
-        all_players = sorted(list(set(all_players)))
-        return jsonify(all_players)
+        body, etag = roster_index.payload("detail" if request.args.get("detail") else "names")
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        # Let browsers keep the list but revalidate it each time
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@player_bp.route("/players/search", methods=["GET"])
+def search_players():
+    """
+    Typeahead: /players/search?q=johnson ty[&limit=10][&team=UCDavis]
+    Ranked candidates, prefix matches first, then fuzzy matches
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing q"}), 400
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    try:
+        return jsonify({
+            "query": query,
+            "results": roster_index.search(query, limit, request.args.get("team")),
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
 
 @player_bp.route("/compare", methods=["GET"])
 def compare_players():
@@ -261,8 +110,8 @@ def compare_players():
         player2 = request.args.get("player2", "").strip()
         if not player1 or not player2:
             return jsonify({"error": "Missing player names"}), 400
-        p1_stats = fetch_player_row(player1)
-        p2_stats = fetch_player_row(player2)
+        rows = fetch_player_rows(player1, player2)
+        p1_stats, p2_stats = rows[player1], rows[player2]
         if not p1_stats or not p2_stats:
             return jsonify({"error": "Player not found"}), 404
         return jsonify({
@@ -279,8 +128,8 @@ def compare_players_stats():
         player2 = request.args.get("player2", "").strip()
         if not player1 or not player2:
             return jsonify({"error": "Missing player names"}), 400
-        p1_stats = fetch_player_row(player1)
-        p2_stats = fetch_player_row(player2)
+        rows = fetch_player_rows(player1, player2)
+        p1_stats, p2_stats = rows[player1], rows[player2]
         if not p1_stats or not p2_stats:
             return jsonify({"error": "Player not found"}), 404
         return jsonify({
@@ -290,6 +139,56 @@ def compare_players_stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@player_bp.route("/compare_many", methods=["GET", "POST"])
+def compare_many():
+    """
+    Compare any number of players in one round trip.
+    GET /compare_many?players=TY Johnson&players=Sevilla, Connor&fields=PPG,RPG
+    or POST {"players": [...], "fields": [...]}. Fields default to the /compare_stats set.
+
+    The payload is columnar: one list per field, aligned with "players". Players that
+    aren't found are listed in "missing" and get nulls in every column.
+    """
+    try:
+        if request.method == "POST":
+            data = request.get_json(silent=True)
+            data = {} if data is None else data
+            if not isinstance(data, dict):
+                return jsonify({"error": "Request body must be a JSON object"}), 400
+            players, fields = data.get("players") or [], data.get("fields") or []
+            for name, values in (("players", players), ("fields", fields)):
+                if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                    return jsonify({"error": f"{name} must be a list of strings"}), 400
+        else:
+            # Names can contain commas ("Sevilla, Connor"), so players are repeated params
+            players = request.args.getlist("players")
+            fields = [f for value in request.args.getlist("fields") for f in value.split(",")]
+        players = list(dict.fromkeys(str(p).strip() for p in players if str(p).strip()))
+        fields = list(dict.fromkeys(str(f).strip() for f in fields if str(f).strip())) or list(COMPARISON_FIELDS)
+
+        if not players:
+            return jsonify({"error": "Missing player names"}), 400
+        if len(players) > MAX_COMPARE_PLAYERS:
+            return jsonify({"error": f"At most {MAX_COMPARE_PLAYERS} players per request"}), 400
+        unknown = [f for f in fields if f not in STAT_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}", "fields": list(STAT_FIELDS)}), 400
+
+        stat_columns = list(dict.fromkeys(STAT_FIELDS[f] for f in fields))
+        rows = fetch_player_rows(*players, columns=["Player Name", "team", "Image URL", *stat_columns])
+        found = [rows[p] or {} for p in players]
+        return jsonify({
+            "players": players,
+            "names": [r.get("Player Name") for r in found],
+            "teams": [r.get("team") for r in found],
+            "imageUrl": [r.get("Image URL") for r in found],
+            "fields": fields,
+            "columns": {f: [r.get(STAT_FIELDS[f]) for r in found] for f in fields},
+            "missing": [p for p in players if rows[p] is None],
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @player_bp.route("/player_image/<player_name>", methods=["GET"])
 def get_player_image(player_name):
     """
@@ -297,24 +196,19 @@ def get_player_image(player_name):
     The frontend will use this to get an image for a specific player.
     """
     try:
-        # Replace hyphens with spaces in the player name
-        player_name = player_name.replace("-", " ")
-        
-        # Fetch the player data
+        # Exact (case/order-insensitive) lookup first; slugs like "TY-Johnson" and
+        # near-misses fall back to the search index. Hyphenated names stay intact.
         player_data = fetch_player_row(player_name)
+        if not player_data:
+            resolved = roster_index.resolve(player_name)
+            if resolved:
+                player_data = fetch_player_row(resolved)
         
         if not player_data:
             return jsonify({"error": "Player not found"}), 404
             
-        # Look for image URL in different possible field names
-        image_url = None
-        if "Image" in player_data:
-            image_url = player_data["Image"]
-        elif "image_url" in player_data:
-            image_url = player_data["image_url"]
-        elif "field30" in player_data:  # Adjust field number as needed
-            image_url = player_data["field30"]
-        
+        image_url = player_data["Image URL"]
+
         if image_url:
             # Redirect to the actual image URL
             return jsonify({"imageUrl": image_url})
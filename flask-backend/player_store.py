@@ -0,0 +1,68 @@
+import os
+import threading
+
+from db_cache import DatabaseVersion
+from ingest import PLAYER_TABLE, ingest_if_stale, name_key
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+# AllPlayers holds one typed row per (season, team, player) (built by ingest.py)
+# and is indexed on the case-folded player name and season.
+
+
+class PlayerStore:
+    """ Re-checks the ingest signature whenever the database changes """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._checked_for = None
+        self._lock = threading.Lock()
+
+    def ensure(self, force=False):
+        version = self.version.current()
+        with self._lock:
+            if force or version != self._checked_for:
+                if ingest_if_stale(self.db_path, force=force):
+                    version = self.version.current()
+                self._checked_for = version
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def ensure_player_store(db_path=DB_PATH, force=False):
+    """
+    Run the ingest if AllPlayers is missing or its sources changed. The sources are
+    re-checked whenever the database version changes; force=True rebuilds regardless.
+    """
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = PlayerStore(db_path)
+    store.ensure(force)
+
+
+def fetch_players(conn, player_names, columns=None, season=None):
+    """
+    Look up several players with a single indexed query.
+    Returns {requested name: row dict or None}, preserving the requested order.
+    With columns, only those (plus name_key) are selected. Each player's latest
+    season is returned unless a season is given.
+    """
+    keys = [name_key(n) for n in player_names]
+    placeholders = ", ".join("?" for _ in keys)
+    selected = "*" if columns is None else ", ".join(f'"{c}"' for c in ["name_key", *columns])
+    season_sql, params = (" AND season = ?", [season]) if season else ("", [])
+    cursor = conn.execute(
+        f'SELECT {selected} FROM "{PLAYER_TABLE}" WHERE name_key IN ({placeholders}){season_sql} ORDER BY season DESC, rowid',
+        keys + params,
+    )
+    columns = [c[0] for c in cursor.description]
+    found = {}
+    for r in cursor.fetchall():
+        row = dict(zip(columns, r))
+        found.setdefault(row["name_key"], row)
+    return {name: found.get(key) for name, key in zip(player_names, keys)}
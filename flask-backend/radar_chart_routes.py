@@ -1,101 +1,151 @@
-from flask import Blueprint, jsonify
-import pandas as pd
-import sqlite3
+from flask import Blueprint, jsonify, request
 import os
+import threading
+import pandas as pd
+from database import read_connection
+from db_cache import DatabaseVersion, cached_json
+from http_cache import enable_http_cache
+from seasons import season_filter
+
+radar_chart_bp = enable_http_cache(Blueprint("radar_chart_bp", __name__))
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+# Radar axis -> (TeamStats column, fixed max value). A fixed max of None means the
+# column is already a 0-100 percentage and is plotted as-is.
+RADAR_STATS = {
+    "Points": ("PTS/gm", 90),
+    "FG%": ("FG%", None),
+    "3PT": ("3PT/gm", 12),
+    "Rebounds": ("REB/gm", 45),
+    "Assists": ("Assists/gm", 25),
+    "Steals": ("STL/gm", 12),
+    "Blocks": ("BLK/gm", 10),
+}
+# "fixed": the hand-picked maxima above. "data": the best team's value on each axis is 100.
+RADAR_SCALE = os.getenv("RADAR_SCALE", "fixed")
+RADAR_SCALES = ("fixed", "data")
+CONFERENCE_AVERAGE = "conference-average"
+# TeamStats rows that summarize the conference rather than describe a team
+SUMMARY_ROWS = ("Conference Average", "Conference Standard Deviation")
+
+
+class RadarVectors:
+    """
+    Normalized radar vectors for every TeamStats row of the latest season plus the
+    conference average, computed once per database version for both scales.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._built_for = None
+        self._lock = threading.Lock()
+        self.max_values = {}
+        self.vectors = {}
+
+    def _build(self):
+        columns = ", ".join(f'"{c}"' for c, _ in RADAR_STATS.values())
+        with read_connection(self.db_path) as conn:
+            condition, params = season_filter(conn, "TeamStats")
+            df = pd.read_sql_query(f"SELECT team, {columns} FROM TeamStats WHERE {condition}", conn, params=params)
+        stats = df.set_index("team")[[c for c, _ in RADAR_STATS.values()]].apply(pd.to_numeric, errors="coerce")
+        teams = stats[~stats.index.isin(SUMMARY_ROWS)]
+        # The conference average is the mean over the team rows only
+        raw = stats.copy()
+        raw.loc[CONFERENCE_AVERAGE] = teams.mean()
+
+        max_values = {
+            "fixed": {label: fixed for label, (_, fixed) in RADAR_STATS.items()},
+            "data": {label: (None if fixed is None else float(teams[column].max())) for label, (column, fixed) in RADAR_STATS.items()},
+        }
+        vectors = {}
+        for scale, maxima in max_values.items():
+            frame = pd.DataFrame({
+                label: raw[column] if maxima[label] is None else 100 * raw[column] / maxima[label]
+                for label, (column, _) in RADAR_STATS.items()
+            })
+            vectors[scale] = frame.astype(object).where(frame.notna(), None).to_dict(orient="index")
+        self.max_values = max_values
+        self.vectors = vectors
+
+    def ensure_built(self):
+        version = self.version.current()
+        with self._lock:
+            if version != self._built_for:
+                self._build()
+                self._built_for = version
+
+    def get(self, team, scale=None):
+        """ Normalized stats for a team (or "conference-average"), or None if unknown """
+        self.ensure_built()
+        return self.vectors[scale or RADAR_SCALE].get(team)
+
+
+radar_vectors = RadarVectors()
+
+
+def _scale():
+    scale = request.args.get("scale")
+    return scale if scale in RADAR_SCALES else RADAR_SCALE
 
-radar_chart_bp = Blueprint("radar_chart_bp", __name__)
-
-def normalize_stats(row):
-    max_values = {
-        "Points": 90,
-        "FG%": 100,
-        "3PT": 12,
-        "Rebounds": 45,
-        "Assists": 25,
-        "Steals": 12,
-        "Blocks": 10
-    }
-    return {
-        "Points": 100 * row["PTS/gm"] / max_values["Points"],
-        "FG%": row["FG%"],  # Already a percentage
-        "3PT": 100 * row["3PT/gm"] / max_values["3PT"],
-        "Rebounds": 100 * row["REB/gm"] / max_values["Rebounds"],
-        "Assists": 100 * row["Assists/gm"] / max_values["Assists"],
-        "Steals": 100 * row["STL/gm"] / max_values["Steals"],
-        "Blocks": 100 * row["BLK/gm"] / max_values["Blocks"],
-    }
 
 @radar_chart_bp.route('/api/radar-chart/<team_name>')
+@cached_json
 def radar_chart(team_name):
-    db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
-    conn = sqlite3.connect(db_path)
-    team_df = pd.read_sql_query("SELECT * FROM TeamStats WHERE team = ?", conn, params=(team_name,))
-    conn.close()
-
-    if team_df.empty:
+    normalized = radar_vectors.get(team_name, _scale())
+    if normalized is None:
         return jsonify({"error": "Team not found"}), 404
-
-    normalized = normalize_stats(team_df.iloc[0])
     return jsonify({"team": team_name, "normalized_stats": normalized})
 
 @radar_chart_bp.route('/api/raw-team-stats/<team_name>')
+@cached_json
 def raw_team_stats(team_name):
-    db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
-    conn = sqlite3.connect(db_path)
-    team_df = pd.read_sql_query("SELECT * FROM TeamStats WHERE team = ?", conn, params=(team_name,))
-    conn.close()
+    with read_connection(DB_PATH) as conn:
+        condition, params = season_filter(conn, "TeamStats", request.args.get("season"), team_name)
+        team_df = pd.read_sql_query(f"SELECT * FROM TeamStats WHERE {condition} AND team = ?", conn, params=(*params, team_name))
 
     if team_df.empty:
         return jsonify({"error": "Team not found"}), 404
 
     raw_data = team_df.iloc[0].to_dict()
     return jsonify({"team": team_name, "raw_stats": raw_data})
-  
+
 
 @radar_chart_bp.route('/api/radar-chart/conference-average')
+@cached_json
 def radar_chart_conference_average():
-    db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM TeamStats", conn)
-    conn.close()
-
-    if df.empty:
+    normalized = radar_vectors.get(CONFERENCE_AVERAGE, _scale())
+    if normalized is None:
         return jsonify({"error": "No data available"}), 404
 
-    max_values = {
-        "Points": 90,
-        "FG%": 100,
-        "3PT": 12,
-        "Rebounds": 45,
-        "Assists": 25,
-        "Steals": 12,
-        "Blocks": 10
-    }
-
-    # Calculate averages for each stat (no extra *100)
-    avg_stats = {
-        "Points": df["PTS/gm"].mean(),
-        "FG%": df["FG%"].mean(),  # Already a percentage
-        "3PT": df["3PT/gm"].mean(),
-        "Rebounds": df["REB/gm"].mean(),
-        "Assists": df["Assists/gm"].mean(),
-        "Steals": df["STL/gm"].mean(),
-        "Blocks": df["BLK/gm"].mean(),
-    }
-
-    # Normalize relative to max values
-    normalized = {
-        "Points": 100 * avg_stats["Points"] / max_values["Points"],
-        "FG%": avg_stats["FG%"],  # already scaled
-        "3PT": 100 * avg_stats["3PT"] / max_values["3PT"],
-        "Rebounds": 100 * avg_stats["Rebounds"] / max_values["Rebounds"],
-        "Assists": 100 * avg_stats["Assists"] / max_values["Assists"],
-        "Steals": 100 * avg_stats["Steals"] / max_values["Steals"],
-        "Blocks": 100 * avg_stats["Blocks"] / max_values["Blocks"]
-    }
-
     return jsonify({
         "normalized_stats": normalized,
         "comparison": "conference_average"
     })
 
+@radar_chart_bp.route('/api/radar-chart/batch')
+@cached_json
+def radar_chart_batch():
+    """
+    Several teams' radar vectors in one call:
+    /api/radar-chart/batch?teams=UCDavis,UCIrvine,conference-average[&scale=data]
+    """
+    teams = [t.strip() for value in request.args.getlist("teams") for t in value.split(",") if t.strip()]
+    if not teams:
+        return jsonify({"error": "Missing teams"}), 400
+    scale = _scale()
+    vectors, missing = {}, []
+    for team in dict.fromkeys(teams):
+        normalized = radar_vectors.get(team, scale)
+        if normalized is None:
+            missing.append(team)
+        else:
+            vectors[team] = normalized
+    return jsonify({
+        "scale": scale,
+        "max_values": radar_vectors.max_values[scale],
+        "teams": vectors,
+        "missing": missing,
+    })
@@ -0,0 +1,173 @@
+"""
+In-memory roster index behind /players.
+
+Built from AllPlayers (see ingest.py) once per database version: one entry per player
+in the latest season with their display name, team and the normalized key used for
+lookups. Only that season is read, so the index doesn't grow as past seasons are added. The /players
+payloads are serialized once per build and carry an ETag derived from their content,
+so the frontend's repeated fetches are answered with 304 Not Modified.
+
+When the database changes, the index first re-runs the ingest if a source table
+changed, so AllPlayers (and everything built on it) follows the team tables.
+
+The same build produces a PlayerSearchIndex for typeahead: token prefixes answer
+"ty jo" style queries directly, and a trigram index narrows the roster down to a
+few candidates that rapidfuzz scores for misspellings. Names are normalized the way
+ingest does it, so "Johnson, TY" and "TY Johnson" are the same player.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from rapidfuzz import fuzz, process
+
+from database import read_connection
+from db_cache import DatabaseVersion
+from ingest import PLAYER_TABLE, canonical_name, ingest_if_stale
+from seasons import latest_season
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+
+# Search tuning; the budget bounds the fuzzy stage, prefix matches are always returned
+SEARCH_BUDGET_MS = float(os.getenv("PLAYER_SEARCH_BUDGET_MS", "20"))
+SEARCH_MAX_CANDIDATES = int(os.getenv("PLAYER_SEARCH_MAX_CANDIDATES", "200"))
+SEARCH_MIN_SCORE = float(os.getenv("PLAYER_SEARCH_MIN_SCORE", "60"))
+MAX_PREFIX = 12
+
+
+def _etag(payload: bytes) -> str:
+    return hashlib.sha1(payload).hexdigest()
+
+
+def search_key(name: str) -> str:
+    """ 'Johnson, TY' / '01 Johnson, TY' -> 'ty johnson': canonical order, no jersey numbers or punctuation """
+    text = re.sub(r"[^\w\s]", " ", canonical_name(name).casefold().replace("-", " "))
+    return " ".join(t for t in text.split() if not t.isdigit())
+
+
+def _trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+    def __init__(self, entries):
+        """ entries: dicts with at least "name" (and usually "team") """
+        self.entries = entries
+        self.keys = [search_key(e["name"]) for e in entries]
+        self.prefixes = {}
+        self.trigrams = {}
+        for i, key in enumerate(self.keys):
+            for token in key.split():
+                for n in range(1, min(len(token), MAX_PREFIX) + 1):
+                    self.prefixes.setdefault(token[:n], set()).add(i)
+            for gram in _trigrams(key):
+                self.trigrams.setdefault(gram, []).append(i)
+
+    def _prefix_matches(self, tokens):
+        """ Entries where every query token starts one of the name's tokens """
+        matches = None
+        for token in tokens:
+            found = set(self.prefixes.get(token[:MAX_PREFIX], ()))
+            if len(token) > MAX_PREFIX:
+                found = {i for i in found if any(t.startswith(token) for t in self.keys[i].split())}
+            matches = found if matches is None else matches & found
+            if not matches:
+                return set()
+        return matches or set()
+
+    def search(self, query: str, limit: int = 10, team: str = None, budget_ms: float = SEARCH_BUDGET_MS):
+        """
+        Ranked candidates: [{"name", "team", "score", "match"}], prefix matches first.
+        The fuzzy stage stops adding candidates once the time budget is spent.
+        """
+        start = time.perf_counter()
+        key = search_key(query)
+        if not key:
+            return []
+        allowed = (lambda i: self.entries[i].get("team") == team) if team else (lambda i: True)
+
+        scored = {}
+        for i in self._prefix_matches(key.split()):
+            if allowed(i):
+                scored[i] = (1, fuzz.WRatio(key, self.keys[i]))
+
+        if len(scored) < limit and (time.perf_counter() - start) * 1000 < budget_ms:
+            counts = Counter(i for gram in _trigrams(key) for i in self.trigrams.get(gram, ()))
+            candidates = {
+                i: self.keys[i] for i, _ in counts.most_common(SEARCH_MAX_CANDIDATES)
+                if i not in scored and allowed(i)
+            }
+            for _, score, i in process.extract(key, candidates, scorer=fuzz.WRatio, limit=limit, score_cutoff=SEARCH_MIN_SCORE):
+                scored[i] = (0, score)
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1][0], -item[1][1], self.keys[item[0]]))[:limit]
+        return [
+            {
+                "name": self.entries[i]["name"],
+                "team": self.entries[i].get("team"),
+                "score": round(score, 1),
+                "match": "prefix" if exact else "fuzzy",
+            }
+            for i, (exact, score) in ranked
+        ]
+
+
+class RosterIndex:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._built_for = None
+        self._lock = threading.Lock()
+        self.entries = []
+        self.payloads = {}
+        self.search_index = PlayerSearchIndex([])
+
+    def _build(self):
+        with read_connection(self.db_path) as conn:
+            rows = conn.execute(
+                f'SELECT "Player Name", team, name_key FROM "{PLAYER_TABLE}" WHERE season = ? ORDER BY "Player Name", team',
+                (latest_season(conn, PLAYER_TABLE),),
+            ).fetchall()
+        self.entries = [{"name": name, "team": team, "key": key} for name, team, key in rows]
+        names = list(dict.fromkeys(e["name"] for e in self.entries))
+        # variant -> (body, etag)
+        self.payloads = {}
+        for variant, value in (("names", names), ("detail", self.entries)):
+            body = json.dumps(value).encode("utf-8")
+            self.payloads[variant] = (body, _etag(body))
+        self.search_index = PlayerSearchIndex(self.entries)
+
+    def ensure_built(self):
+        version = self.version.current()
+        with self._lock:
+            if version != self._built_for:
+                if ingest_if_stale(self.db_path):
+                    version = self.version.current()
+                self._build()
+                self._built_for = version
+
+    def payload(self, variant="names"):
+        """ (JSON body, ETag) for the names list or the detailed entries """
+        self.ensure_built()
+        return self.payloads[variant]
+
+    def search(self, query: str, limit: int = 10, team: str = None):
+        self.ensure_built()
+        return self.search_index.search(query, limit, team)
+
+    def resolve(self, query: str, min_score: float = 90):
+        """ The display name of the best match for a loosely written name, or None """
+        matches = self.search(query, limit=1)
+        if matches and matches[0]["score"] >= min_score:
+            return matches[0]["name"]
+        return None
+
+
+roster_index = RosterIndex()
@@ -0,0 +1,200 @@
+"""
+Compact schema context for the chatbot prompts.
+
+db.get_table_info() renders full CREATE statements plus sample rows for every table,
+and that whole block used to go into each query_decision_agent prompt. The catalog
+here is built once per database version straight from sqlite: one line per table with
+its column names, the per-team player tables collapsed into a single shared layout,
+and the legacy 'field*' columns labelled from their header row. For each question only
+the tables relevant to the mentioned teams are included.
+
+Once migrate.py has folded the per-team tables into the long-format ones, the text
+is just the shared tables, whatever the number of teams and seasons loaded.
+"""
+import math
+import os
+import re
+import threading
+
+from database import read_connection
+from db_cache import DatabaseVersion
+from seasons import latest_season
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+DEFAULT_TEAM = "UCDavis"
+
+# Team key (as used in table names and TeamStats.team) -> phrases that refer to it
+TEAM_ALIASES = {
+    "UCDavis": ["uc davis", "ucdavis", "ucd", "aggies"],
+    "CalPolySLO": ["cal poly", "calpoly", "mustangs"],
+    "CalStateBakersfield": ["bakersfield", "csub", "roadrunners"],
+    "CalStateFullerton": ["fullerton", "csuf", "titans"],
+    "CalStateNorthridge": ["northridge", "csun", "matadors"],
+    "LongBeachState": ["long beach", "lbsu"],
+    "UCIrvine": ["uc irvine", "irvine", "uci", "anteaters"],
+    "UCRiverside": ["uc riverside", "riverside", "ucr", "highlanders"],
+    "UCSanDiego": ["uc san diego", "san diego", "ucsd", "tritons"],
+    "UCSantaBarbara": ["uc santa barbara", "santa barbara", "ucsb", "gauchos"],
+    "UniversityOfHawaii": ["hawaii", "rainbow warriors"],
+}
+# Short forms that are also ordinary words or surnames ("Anthony Davis", "the beach"):
+# only matched when the text is also about basketball
+LOOSE_ALIASES = {
+    "UCDavis": ["davis"],
+    "CalPolySLO": ["slo"],
+    "LongBeachState": ["beach"],
+}
+CONTEXT_WORDS = {
+    "team", "teams", "game", "games", "play", "plays", "played", "playing", "player", "players",
+    "roster", "season", "record", "win", "wins", "won", "lose", "loss", "losses", "lost", "beat",
+    "vs", "against", "basketball", "conference", "coach", "stats", "points", "ppg", "rebounds",
+    "assists", "steals", "blocks", "turnovers", "shooting", "shoot", "offense", "defense", "scout", "scouting",
+}
+# Always described, whatever teams the question mentions
+SHARED_TABLES = ("AllPlayers", "TeamStats", "GameLog")
+HIDDEN_TABLES = ("AllPlayers_meta", "GameLog_meta")
+# Raw source tables (by name suffix) described only when their typed replacement is missing
+RAW_TABLES = {"_game_log": "GameLog"}
+
+
+def match_teams(text: str) -> list:
+    """ Team keys mentioned in the text, in the order they first appear """
+    lowered = f" {' '.join(re.sub(r'[^a-z0-9 ]', ' ', str(text or '').lower()).split())} "
+    basketball = not CONTEXT_WORDS.isdisjoint(lowered.split())
+    found = []
+    for team, aliases in TEAM_ALIASES.items():
+        aliases = aliases + [team.lower()] + (LOOSE_ALIASES.get(team, []) if basketball else [])
+        positions = [lowered.find(f" {alias} ") for alias in aliases]
+        positions = [p for p in positions if p >= 0]
+        if positions:
+            found.append((min(positions), team))
+    return [team for _, team in sorted(found)]
+
+
+_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    """ tiktoken count when its encoding is available locally, otherwise ~4 characters per token """
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+class SchemaCatalog:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._built_for = None
+        self._lock = threading.Lock()
+        self.shared_lines = {}
+        self.team_tables = {}
+        self.team_layout = ""
+        # (database version, token count of the full get_table_info() text)
+        self._full_tokens = (None, None)
+
+    def _build(self):
+        with read_connection(self.db_path) as conn:
+            tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")]
+            shared_lines, team_tables, layouts = {}, {}, {}
+            for table in tables:
+                if table in HIDDEN_TABLES or any(table.endswith(s) and t in tables for s, t in RAW_TABLES.items()):
+                    continue
+                columns = [(r[1], r[2]) for r in conn.execute(f'PRAGMA table_info("{table}")')]
+                if table.strip().endswith("_player_stats"):
+                    team = table.strip()[: -len("_player_stats")]
+                    names = [c for c, _ in columns]
+                    if "Player Name" in names:
+                        layout = ", ".join(f'"{c}"' for c in names)
+                        layouts[layout] = layouts.get(layout, 0) + 1
+                        team_tables[team] = f'"{table}"'
+                    else:
+                        # Legacy layout: label each field* column with the header stored in its first row
+                        header = conn.execute(f'SELECT * FROM "{table}" WHERE field1 = ?', ("#",)).fetchone()
+                        labels = ", ".join(f"{c}={h}" for c, h in zip(names, header or [])) if header else ", ".join(names)
+                        team_tables[team] = f'"{table}" (season totals, TEXT columns, first row is the header; {labels})'
+                else:
+                    shared_lines[table] = f'"{table}"(' + ", ".join(f'"{c}" {t}'.strip() for c, t in columns) + ")"
+
+            seasons = {t: latest_season(conn, t) for t in SHARED_TABLES if t in shared_lines}
+
+        def season_note(table):
+            season = seasons.get(table)
+            return f"; latest season is '{season}', filter on it unless another season is asked for" if season else ""
+
+        team_keys = ", ".join(TEAM_ALIASES)
+        if "TeamStats" in shared_lines:
+            shared_lines["TeamStats"] += (
+                f"  -- team is one of: {team_keys}, Conference Average, Conference Standard Deviation{season_note('TeamStats')}"
+            )
+        if "AllPlayers" in shared_lines:
+            shared_lines["AllPlayers"] += (
+                f"  -- one row per (season, team, player), per-game stats, percentages 0-100{season_note('AllPlayers')}"
+            )
+        if "GameLog" in shared_lines:
+            shared_lines["GameLog"] += (
+                "  -- one row per (season, team, game) in schedule order (game 1 = first), percentages 0-100,"
+                " streak > 0 wins in a row, last5_*/last10_* are rolling values over the last 5/10 games"
+                f" up to and including that game{season_note('GameLog')}"
+            )
+
+        self.shared_lines = shared_lines
+        self.team_tables = team_tables
+        common = max(layouts, key=layouts.get) if layouts else ""
+        self.team_layout = f"Per-team player tables (per-game stats) share these columns: {common}" if common else ""
+
+    def ensure_built(self):
+        version = self.version.current()
+        with self._lock:
+            if version != self._built_for:
+                self._build()
+                self._built_for = version
+
+    def full_tokens(self, table_info) -> int:
+        """ Tokens in the full get_table_info() text; table_info is called once per database version """
+        self.ensure_built()
+        version = self._built_for
+        if self._full_tokens[0] != version:
+            self._full_tokens = (version, count_tokens(table_info()))
+        return self._full_tokens[1]
+
+    def describe(self, teams=None) -> str:
+        """ Compact schema text covering the shared tables plus the given teams' player tables """
+        self.ensure_built()
+        teams = [t for t in (teams or []) if t in self.team_tables] or [t for t in [DEFAULT_TEAM] if t in self.team_tables]
+        lines = [self.shared_lines[t] for t in SHARED_TABLES if t in self.shared_lines]
+        lines += [line for t, line in self.shared_lines.items() if t not in SHARED_TABLES]
+        if self.team_layout:
+            lines.append(self.team_layout)
+        if teams:
+            lines.append("Player tables for the teams in this question: " + "; ".join(self.team_tables[t] for t in teams))
+        others = [t for t in self.team_tables if t not in teams]
+        if others:
+            lines.append("Other teams with player tables (<team>_player_stats): " + ", ".join(others))
+        return "\n".join(lines)
+
+    def for_question(self, question: str, memory: str = "", full_table_info=None):
+        """
+        Schema text for one question, plus a token report against the full get_table_info() text
+        (full_table_info is a callable returning it, see full_tokens).
+        Teams are matched in the question first, then in the recent memory.
+        """
+        teams = match_teams(question) or match_teams(memory)
+        text = self.describe(teams)
+        report = {"teams": teams or [DEFAULT_TEAM], "tokens": count_tokens(text)}
+        if full_table_info is not None:
+            report["full_tokens"] = self.full_tokens(full_table_info)
+            report["saved_tokens"] = report["full_tokens"] - report["tokens"]
+        return text, report
+
+
+schema_catalog = SchemaCatalog()
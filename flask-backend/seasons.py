@@ -0,0 +1,35 @@
+"""
+Seasons in the long-format tables.
+
+AllPlayers, GameLog and (once migrated) TeamStats hold every team and season in one
+table, keyed by (season, team[, player]), instead of encoding them in table names;
+see migrate.py. Readers default to the latest season present. Season labels sort
+chronologically as text ("2024-25").
+"""
+import os
+
+# Season label given to rows read from the per-team source tables
+SEASON = os.getenv("SEASON", "2024-25")
+
+
+def has_season(conn, table):
+    return any(r[1] == "season" for r in conn.execute(f'PRAGMA table_info("{table}")'))
+
+
+def latest_season(conn, table, team=None):
+    """ The most recent season in a table (optionally for one team); None without a season column or rows """
+    if not has_season(conn, table):
+        return None
+    if team is None:
+        return conn.execute(f'SELECT MAX(season) FROM "{table}"').fetchone()[0]
+    return conn.execute(f'SELECT MAX(season) FROM "{table}" WHERE team = ?', (team,)).fetchone()[0]
+
+
+def season_filter(conn, table, season=None, team=None):
+    """
+    (SQL condition, params) restricting a table to one season, the latest by default.
+    Tables without a season column (TeamStats before migrate.py) get an always-true condition.
+    """
+    if not has_season(conn, table):
+        return "1 = 1", []
+    return "season = ?", [season or latest_season(conn, table, team)]
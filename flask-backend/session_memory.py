@@ -0,0 +1,128 @@
+"""
+Per-session conversation memory for the chatbot.
+
+Each thread_id gets its own ring buffer of recent messages, so one coach's context
+never shows up in another's prompts and a long conversation doesn't grow without
+bound. Messages that fall out of the buffer are folded into a running summary once
+enough of them pile up (summarizer is called off the request path). Idle sessions are
+evicted by TTL and the store itself is LRU-bounded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "1000"))
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "3600"))
+CHAT_SESSION_BUFFER = int(os.getenv("CHAT_SESSION_BUFFER", "10"))
+# Summarize once this many messages have dropped out of the ring buffer
+CHAT_SUMMARY_THRESHOLD = int(os.getenv("CHAT_SUMMARY_THRESHOLD", "6"))
+
+
+class SessionMemory:
+    """ Ring buffer of recent messages plus a summary of everything older """
+
+    def __init__(self, buffer_size=CHAT_SESSION_BUFFER):
+        self.messages = deque(maxlen=buffer_size)
+        self.overflow = []
+        self.summary = ""
+        # Set while a summarization of this session is queued or running
+        self.summarizing = False
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _append(self, actor: str, message: str):
+        with self.lock:
+            if len(self.messages) == self.messages.maxlen:
+                self.overflow.append(self.messages[0])
+            self.messages.append({"actor": actor, "content": message})
+            self.last_used = time.monotonic()
+
+    def add_user_message(self, message: str):
+        self._append("human", message)
+
+    def add_ai_message(self, message: str):
+        self._append("ai", message)
+
+    def get_context(self, limit=10) -> str:
+        with self.lock:
+            recent = list(self.messages)[-limit:]
+            summary = self.summary
+        lines = [f"SUMMARY OF EARLIER CONVERSATION: {summary}"] if summary else []
+        lines += [f"{m['actor'].upper()}: {m['content']}" for m in recent]
+        return "\n".join(lines)
+
+    def take_overflow(self, threshold: int):
+        """
+        Hand the overflowed messages to the summarizer once there are enough of them.
+        Only one batch per session is out at a time; the next is taken when it finishes.
+        """
+        with self.lock:
+            if self.summarizing or len(self.overflow) < threshold:
+                return None
+            taken, self.overflow = self.overflow, []
+            self.summarizing = True
+            return taken
+
+
+class SessionMemoryStore:
+    def __init__(self, max_sessions=CHAT_SESSION_MAX, ttl=CHAT_SESSION_TTL_SECONDS,
+                 buffer_size=CHAT_SESSION_BUFFER, summary_threshold=CHAT_SUMMARY_THRESHOLD, summarizer=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.buffer_size = buffer_size
+        self.summary_threshold = summary_threshold
+        # summarizer(previous_summary: str, messages: list[dict]) -> str
+        self.summarizer = summarizer
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+    def _evict(self, now):
+        for thread_id in [t for t, s in self._sessions.items() if now - s.last_used > self.ttl]:
+            del self._sessions[thread_id]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, thread_id: str) -> SessionMemory:
+        """ Memory for a thread, created on first use """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(thread_id)
+            if session is None:
+                session = SessionMemory(self.buffer_size)
+                self._sessions[thread_id] = session
+            self._sessions.move_to_end(thread_id)
+            session.last_used = now
+            return session
+
+    def maybe_summarize(self, session: SessionMemory):
+        """ Fold overflowed messages into the session summary in the background """
+        if self.summarizer is None:
+            return
+        messages = session.take_overflow(self.summary_threshold)
+        if messages is None:
+            return
+
+        def run():
+            # Read the summary when the job runs, so it includes the previous batch
+            with session.lock:
+                previous = session.summary
+            try:
+                summary = self.summarizer(previous, messages)
+                with session.lock:
+                    session.summary = summary
+            except Exception as e:
+                print(f"[SessionMemory] Summarization failed: {e}")
+            finally:
+                with session.lock:
+                    session.summarizing = False
+            # Messages that overflowed while this batch was running
+            self.maybe_summarize(session)
+
+        self._executor.submit(run)
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,246 @@
+"""
+Deterministic SQL fast path for simple stat lookups.
+
+Questions like "how many assists does TY Johnson average" or "UC Davis team FG%" used
+to go through the ReAct agent (list tables -> schema -> query checker -> query, one LLM
+round trip each). Here an intent matcher built from the database's own player names,
+team names and columns recognises those lookups and answers them with a parameterized
+SQL template. Anything it can't match confidently falls back to the agent.
+Lookups are answered from the latest season in the database.
+"""
+import os
+import re
+import threading
+
+from database import read_connection
+from db_cache import DatabaseVersion
+from ingest import PLAYER_TABLE, canonical_name
+from player_store import ensure_player_store
+from schema_catalog import match_teams
+from seasons import latest_season
+
+# Database path (root directory)
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ucd-basketball.db"))
+
+TEAM_TABLE = "TeamStats"
+CONFERENCE_AVERAGE = "Conference Average"
+
+# Stat phrase -> (AllPlayers column, TeamStats column). Aliases whose column isn't in
+# the database are dropped when the matcher is built.
+STAT_ALIASES = {
+    "points": ("PTS/gm", "PTS/gm"),
+    "ppg": ("PTS/gm", "PTS/gm"),
+    "scoring": ("PTS/gm", "PTS/gm"),
+    "scorer": ("PTS/gm", "PTS/gm"),
+    "assists": ("Assists/gm", "Assists/gm"),
+    "apg": ("Assists/gm", "Assists/gm"),
+    "rebounds": ("REB/gm", "REB/gm"),
+    "boards": ("REB/gm", "REB/gm"),
+    "rebounder": ("REB/gm", "REB/gm"),
+    "rpg": ("REB/gm", "REB/gm"),
+    "offensive rebounds": ("OFF REB/gm", "OFF REB/gm"),
+    "defensive rebounds": ("DEF REB/gm", "DEF REB/gm"),
+    "steals": ("STL/gm", "STL/gm"),
+    "blocks": ("BLK/gm", "BLK/gm"),
+    "turnovers": ("Turnovers/gm", "Turnovers/gm"),
+    "fouls": ("FLS/gm", "FLS/gm"),
+    "minutes": ("Minutes/gm", None),
+    "field goal percentage": ("FG%", "FG%"),
+    "fg%": ("FG%", "FG%"),
+    "fg %": ("FG%", "FG%"),
+    "three point percentage": ("3PT%", "_3PT_PCT"),
+    "3 point percentage": ("3PT%", "_3PT_PCT"),
+    "3pt%": ("3PT%", "_3PT_PCT"),
+    "3p%": ("3PT%", "_3PT_PCT"),
+    "free throw percentage": ("FT%", "FT%"),
+    "ft%": ("FT%", "FT%"),
+    "threes": ("3PT Made/gm", "3PT/gm"),
+    "three pointers": ("3PT Made/gm", "3PT/gm"),
+    "3 pointers": ("3PT Made/gm", "3PT/gm"),
+    "free throws": ("FTM/gm", "FTM/gm"),
+    "games played": ("Games Played", "TOT_GP"),
+}
+LEADER_WORDS = {"leading", "leader", "leaders", "top", "best", "most", "highest"}
+# Questions about a player without naming one ("which UC Davis player ...") are not team lookups
+PLAYER_WORDS = {"player", "players", "who", "whos", "guy", "guys"}
+# Anything that needs reasoning across rows, trends or narrative goes to the agent, and so
+# does anything about what opponents do: "points allowed" is not the PTS/gm column.
+# So do references to the conversation ("he", "that"), which the templates can't resolve,
+# bottom-of-the-list questions (leader lookups only sort descending), rankings, and
+# splits (home/away, halves, wins/losses) that the season averages don't have.
+# Words are matched exactly, stems against the start of each word ("compar" covers
+# compare, compared, comparing, comparison).
+AGENT_WORDS = {
+    "vs", "why", "last", "should", "against", "defense", "defence", "worst", "lowest",
+    "he", "him", "his", "she", "her", "hers", "they", "them", "their", "theirs",
+    "it", "its", "that", "those", "these", "same", "previous", "before",
+    "fewest", "least", "bottom",
+    "home", "away", "road", "half", "halves", "overtime", "quarter", "month", "since", "during",
+    "win", "wins", "won", "loss", "losses", "lost",
+}
+AGENT_STEMS = (
+    "compar", "versus", "scout", "report", "trend", "improv", "strength", "weak", "lineup",
+    "analy", "allow", "opponent", "concede", "defend", "held", "hold", "rank", "standing",
+)
+AGENT_PHRASES = ("give up", "gives up", "gave up", "giving up", "given up")
+
+
+def _normalize(text):
+    """ Lowercase, keep % and letters/digits, collapse whitespace """
+    text = re.sub(r"[^a-z0-9%]+", " ", str(text or "").lower())
+    return " ".join(re.sub(r"\s+%", "%", text).split())
+
+
+def _contains(text, phrase):
+    return f" {phrase} " in f" {text} "
+
+
+def needs_agent(text):
+    """ True if a normalized question asks for more than a single stat lookup """
+    words = text.split()
+    return (
+        any(w in AGENT_WORDS or w.startswith(AGENT_STEMS) for w in words)
+        or any(_contains(text, phrase) for phrase in AGENT_PHRASES)
+    )
+
+
+class IntentMatcher:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.version = DatabaseVersion(db_path)
+        self._built_for = None
+        self._lock = threading.Lock()
+        self.players = {}
+        self.stats = []
+        self.season = None
+        self.team_season = None
+
+    def _build(self):
+        ensure_player_store(self.db_path)
+        with read_connection(self.db_path) as conn:
+            player_columns = {r[1] for r in conn.execute(f'PRAGMA table_info("{PLAYER_TABLE}")')}
+            team_columns = {r[1] for r in conn.execute(f'PRAGMA table_info("{TEAM_TABLE}")')}
+            season = latest_season(conn, PLAYER_TABLE)
+            # None while TeamStats has no season column (see migrate.py)
+            team_season = latest_season(conn, TEAM_TABLE)
+            players = {}
+            rows = conn.execute(f'SELECT name_key, "Player Name", team FROM "{PLAYER_TABLE}" WHERE season = ?', (season,))
+            for name_key, name, team in rows:
+                # Match both "TY Johnson" and "Johnson, TY"
+                first_last = canonical_name(name)
+                parts = first_last.split()
+                for form in {first_last, name, " ".join(parts[-1:] + parts[:-1])}:
+                    players.setdefault(_normalize(form), (name_key, name, team))
+
+        aliases = dict(STAT_ALIASES)
+        # The stat columns themselves are aliases too ("pts/gm", "reb/gm", ...)
+        for col in player_columns & team_columns:
+            if "/" in col or "%" in col:
+                aliases.setdefault(_normalize(col), (col, col))
+        stats = []
+        for phrase, (player_col, team_col) in aliases.items():
+            player_col = player_col if player_col in player_columns else None
+            team_col = team_col if team_col in team_columns else None
+            if player_col or team_col:
+                stats.append((_normalize(phrase), player_col, team_col))
+        # Longest phrase first, so "offensive rebounds" wins over "rebounds"
+        stats.sort(key=lambda s: len(s[0]), reverse=True)
+        self.players = players
+        self.stats = stats
+        self.season = season
+        self.team_season = team_season
+
+    def ensure_built(self):
+        version = self.version.current()
+        with self._lock:
+            if version != self._built_for:
+                self._build()
+                self._built_for = version
+
+    def _match_stats(self, text):
+        matched, taken = [], text
+        for phrase, player_col, team_col in self.stats:
+            if _contains(taken, phrase):
+                if (player_col, team_col) not in matched:
+                    matched.append((player_col, team_col))
+                taken = f" {taken} ".replace(f" {phrase} ", " | ").strip()
+        return matched
+
+    def match(self, question: str):
+        """
+        Return a lookup intent for simple stat questions, or None to fall back to the agent.
+        """
+        self.ensure_built()
+        text = _normalize(question)
+        words = set(text.split())
+        if not text or needs_agent(text):
+            return None
+        stats = self._match_stats(text)
+        if not stats:
+            return None
+
+        players = list({p[0]: p for key, p in self.players.items() if _contains(text, key)}.values())
+        teams = match_teams(question)
+        if "conference average" in text or "conference avg" in text:
+            teams.append(CONFERENCE_AVERAGE)
+
+        if players:
+            columns = [p for p, _ in stats if p]
+            if not columns or len(players) > 3:
+                return None
+            return {"kind": "player", "players": players, "columns": columns, "teams": [p[2] for p in players], "season": self.season}
+        if teams and words & LEADER_WORDS:
+            columns = [p for p, _ in stats if p]
+            if len(columns) != 1 or len(teams) != 1 or teams[0] == CONFERENCE_AVERAGE:
+                return None
+            return {"kind": "leader", "teams": teams, "columns": columns, "season": self.season}
+        if teams and not words & PLAYER_WORDS:
+            columns = [t for _, t in stats if t]
+            if not columns:
+                return None
+            return {"kind": "team", "teams": teams, "columns": columns, "season": self.team_season}
+        return None
+
+
+def build_query(intent):
+    """ Parameterized SQL for an intent: (sql, params) """
+    cols = ", ".join(f'"{c}"' for c in intent["columns"])
+    if intent["kind"] == "player":
+        keys = [p[0] for p in intent["players"]]
+        placeholders = ", ".join("?" for _ in keys)
+        return (
+            f'SELECT "Player Name", team, {cols} FROM "{PLAYER_TABLE}" WHERE season = ? AND name_key IN ({placeholders})',
+            [intent["season"], *keys],
+        )
+    if intent["kind"] == "leader":
+        col = intent["columns"][0]
+        return (
+            f'SELECT "Player Name", team, "{col}" FROM "{PLAYER_TABLE}" WHERE season = ? AND team = ? AND "{col}" IS NOT NULL ORDER BY "{col}" DESC LIMIT 3',
+            [intent["season"], intent["teams"][0]],
+        )
+    placeholders = ", ".join("?" for _ in intent["teams"])
+    if intent.get("season"):
+        return (
+            f'SELECT team, {cols} FROM "{TEAM_TABLE}" WHERE season = ? AND team IN ({placeholders})',
+            [intent["season"], *intent["teams"]],
+        )
+    return (f'SELECT team, {cols} FROM "{TEAM_TABLE}" WHERE team IN ({placeholders})', list(intent["teams"]))
+
+
+def run_intent(intent, db_path=DB_PATH):
+    """ Execute the intent's template and render the rows the way the agent's results read """
+    sql, params = build_query(intent)
+    with read_connection(db_path) as conn:
+        cursor = conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        rows = cursor.fetchall()
+    if not rows:
+        return None, sql
+    source = TEAM_TABLE if intent["kind"] == "team" else PLAYER_TABLE
+    lines = [f"{source} ({'top 3 by ' + intent['columns'][0] if intent['kind'] == 'leader' else 'lookup'}):"]
+    for row in rows:
+        lines.append("; ".join(f"{c} = {v}" for c, v in zip(columns, row)))
+    return "\n".join(lines), sql
+
+
+intent_matcher = IntentMatcher()
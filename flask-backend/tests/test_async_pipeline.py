@@ -0,0 +1,26 @@
+import asyncio
+import threading
+
+import chatbot_routes
+
+
+def test_fast_path_runs_off_the_event_loop(monkeypatch):
+    threads = {}
+
+    def fast_path_lookup(question):
+        threads["lookup"] = threading.current_thread()
+        return {"teams": ["UCDavis"]}, "AllPlayers (lookup):", "SELECT 1"
+
+    async def agenerate_answer(state, memory="", formatted=False):
+        threads["loop"] = threading.current_thread()
+        return f"answer with memory: {memory}"
+
+    monkeypatch.setattr(chatbot_routes, "get_llm", lambda: None)
+    monkeypatch.setattr(chatbot_routes, "_fast_path_lookup", fast_path_lookup)
+    monkeypatch.setattr(chatbot_routes, "agenerate_answer", agenerate_answer)
+    state = {"question": "How many points does TY Johnson average?", "relevant_stats": "", "result": "", "answer": "", "memory": "HUMAN: hi"}
+
+    result = asyncio.run(chatbot_routes.apipeline(state, mode="fast"))
+    assert result["path"] == "fast_path"
+    assert result["response"] == "answer with memory: HUMAN: hi"
+    assert threads["lookup"] is not threads["loop"]
@@ -0,0 +1,26 @@
+import sqlite3
+
+import pytest
+
+from chat_cache import ChatResponseCache
+from db_cache import DatabaseVersion
+
+
+@pytest.fixture
+def cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    sqlite3.connect(path).close()
+    return ChatResponseCache(version=DatabaseVersion(path))
+
+
+def test_follow_ups_are_not_shared_across_conversations(cache):
+    cache.put("What about assists?", "HUMAN: Who leads UC Davis in scoring?", "davis answer")
+    assert cache.get("What about assists?", "HUMAN: Who leads UC Davis in scoring?") == "davis answer"
+    assert cache.get("What about assists?", "HUMAN: Who leads UC Irvine in scoring?") is None
+    assert cache.get("What about assists?", "") is None
+
+
+def test_first_questions_are_shared(cache):
+    cache.put("Who leads UC Davis in scoring?", "", "answer")
+    assert cache.get("who leads UC Davis in scoring", "  ") == "answer"
+    assert cache.get("Who leads UC Davis in scoring?", "HUMAN: hi") is None
@@ -0,0 +1,51 @@
+import gzip
+
+import pytest
+
+from app import create_app
+
+TEAMS = "UCDavis,UCIrvine,UCRiverside,UCSanDiego,UCSantaBarbara,CalPolySLO,LongBeachState,conference-average"
+SMALL = "/api/radar-chart/UCDavis"
+LARGE = f"/api/radar-chart/batch?teams={TEAMS}"
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app(warm_up=False).test_client()
+
+
+def test_etag_and_cache_control_on_200(client):
+    response = client.get(SMALL)
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert "Content-Encoding" not in response.headers
+
+
+def test_if_none_match_returns_empty_304(client):
+    etag = client.get(SMALL).headers["ETag"]
+    response = client.get(SMALL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_gzip_etag_returns_empty_304(client):
+    headers = {"Accept-Encoding": "gzip"}
+    etag = client.get(LARGE, headers=headers).headers["ETag"]
+    assert etag.endswith('-gzip"')
+    response = client.get(LARGE, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_gzip_body_decompresses_to_identity_body(client):
+    identity = client.get(LARGE)
+    compressed = client.get(LARGE, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert len(compressed.data) < len(identity.data)
+    assert gzip.decompress(compressed.data) == identity.data
+    # The identity and gzip variants must not share an ETag
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
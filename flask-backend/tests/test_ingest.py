@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+import ingest
+from player_store import ensure_player_store
+from seasons import has_season
+
+COLUMNS = ", ".join(f'"{c}"' for c in ingest.PLAYER_COLUMNS)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Keep the real CSV out of the signature and the UCDavis merge
+    monkeypatch.setattr(ingest, "CSV_PATH", str(tmp_path / "missing.csv"))
+    monkeypatch.setattr(ingest, "load_csv_players", lambda: [])
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f'CREATE TABLE "UCDavis_player_stats" ({COLUMNS})')
+    conn.execute('INSERT INTO "UCDavis_player_stats" ("Player Name", "PTS/gm") VALUES (?, ?)', ("TY Johnson", 21.4))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_upgrades_table_without_season_in_place(db_path):
+    conn = sqlite3.connect(db_path)
+    # AllPlayers and its signature as written before seasons were added
+    conn.execute(f'CREATE TABLE "{ingest.PLAYER_TABLE}" (team TEXT, source_table TEXT, name_key TEXT, {COLUMNS})')
+    conn.execute(f'INSERT INTO "{ingest.PLAYER_TABLE}" (team, name_key, "Player Name") VALUES (?, ?, ?)', ("UCDavis", "ty johnson", "TY Johnson"))
+    conn.execute(f'CREATE TABLE "{ingest.META_TABLE}" (signature TEXT)')
+    conn.execute(f'INSERT INTO "{ingest.META_TABLE}" VALUES (?)', ("UCDavis_player_stats:1",))
+    conn.commit()
+    conn.close()
+
+    assert ingest.ingest_if_stale(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert has_season(conn, ingest.PLAYER_TABLE)
+    assert conn.execute(f'SELECT season, "PTS/gm" FROM "{ingest.PLAYER_TABLE}"').fetchall() == [(ingest.SEASON, 21.4)]
+    conn.close()
+    assert not ingest.ingest_if_stale(db_path)
+
+
+def test_signature_keeps_schema_version(db_path, monkeypatch):
+    conn = sqlite3.connect(db_path)
+    signature = ingest.source_signature(conn)
+    monkeypatch.setattr(ingest, "SCHEMA_VERSION", ingest.SCHEMA_VERSION + 1)
+    assert ingest.source_signature(conn) != signature
+    conn.close()
+
+
+def test_in_place_update_is_picked_up(db_path):
+    ensure_player_store(db_path)
+    conn = sqlite3.connect(db_path)
+    # Same tables and row count, new values
+    conn.execute('UPDATE "UCDavis_player_stats" SET "PTS/gm" = 30.0')
+    conn.commit()
+
+    ensure_player_store(db_path)
+    assert conn.execute(f'SELECT "PTS/gm" FROM "{ingest.PLAYER_TABLE}"').fetchall() == [(30.0,)]
+    conn.close()
+
+
+def test_automatic_ingest_keeps_migrated_season(db_path):
+    conn = sqlite3.connect(db_path)
+    ingest.run_ingest(conn, "2024-25")
+    # What migrate.py leaves behind, then next season's scrape into the same table
+    conn.execute(f'UPDATE "{ingest.PLAYER_TABLE}" SET source_table = NULL')
+    conn.execute('UPDATE "UCDavis_player_stats" SET "PTS/gm" = 25.0')
+    conn.commit()
+
+    ingest.run_ingest(conn, "2024-25")
+    assert conn.execute(f'SELECT season, "PTS/gm" FROM "{ingest.PLAYER_TABLE}"').fetchall() == [("2024-25", 21.4)]
+
+    ingest.run_ingest(conn, "2025-26", replace_migrated=True)
+    rows = conn.execute(f'SELECT season, "PTS/gm" FROM "{ingest.PLAYER_TABLE}" ORDER BY season').fetchall()
+    assert rows == [("2024-25", 21.4), ("2025-26", 25.0)]
+    conn.close()
+
+
+def test_csv_is_only_merged_into_its_own_season(db_path, monkeypatch):
+    csv_player = {"Player Name": "Csv Only", "Number": 99, "Games Played": 30}
+    monkeypatch.setattr(ingest, "load_csv_players", lambda: [dict(csv_player)])
+    conn = sqlite3.connect(db_path)
+    ingest.run_ingest(conn, ingest.CSV_SEASON)
+    conn.execute(f'UPDATE "{ingest.PLAYER_TABLE}" SET source_table = NULL')
+    conn.commit()
+    ingest.run_ingest(conn, "2099-00", replace_migrated=True)
+    rows = conn.execute(f'SELECT season, "Player Name" FROM "{ingest.PLAYER_TABLE}" ORDER BY season, "Player Name"').fetchall()
+    conn.close()
+    assert rows == [(ingest.CSV_SEASON, "Csv Only"), (ingest.CSV_SEASON, "TY Johnson"), ("2099-00", "TY Johnson")]
@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+import game_log
+import ingest
+import migrate
+
+GAME_COLUMNS = '"Opponent", "Score", "Win_Loss", "FGM_A", "ThreeFG_A", "FTM_A"'
+GAMES = [
+    ("vs  Menlo", "79-75", "W", "26-61", "8-20", "19-25"),
+    ("at  Idaho", "60-70", "L", "22-58", "5-18", "11-14"),
+    ("Totals", "-", "", "48-119", "13-38", "30-39"),
+]
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "CSV_PATH", str(tmp_path / "missing.csv"))
+    monkeypatch.setattr(ingest, "load_csv_players", lambda: [])
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    for table in ("UC_Davis_game_log", "UC_Irvine_game_log"):
+        conn.execute(f'CREATE TABLE "{table}" ({GAME_COLUMNS})')
+        conn.executemany(f'INSERT INTO "{table}" VALUES (?, ?, ?, ?, ?, ?)', GAMES)
+    conn.execute('CREATE TABLE TeamStats (team TEXT, "PTS/gm" REAL)')
+    conn.executemany("INSERT INTO TeamStats VALUES (?, ?)", [("UCDavis", 70.0), ("UCIrvine", 75.0)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_every_game_log_table_is_ingested(conn):
+    assert game_log.run_ingest(conn) == 4
+    teams = conn.execute(f'SELECT team, COUNT(*) FROM "{game_log.GAME_TABLE}" GROUP BY team ORDER BY team').fetchall()
+    assert teams == [("UCDavis", 2), ("UCIrvine", 2)]
+
+
+def test_rescraped_team_stats_replace_the_season(conn):
+    migrate.migrate(conn, "2024-25")
+    # The scraper appends the same season again, with updated values
+    conn.executemany("INSERT INTO TeamStats (team, \"PTS/gm\") VALUES (?, ?)", [("UCDavis", 72.0), ("UCDavis", 73.0)])
+    conn.commit()
+    assert migrate.plan(conn)[1]
+
+    migrate.migrate(conn, "2024-25")
+    rows = conn.execute('SELECT season, team, "PTS/gm" FROM TeamStats ORDER BY team').fetchall()
+    assert rows == [("2024-25", "UCDavis", 73.0), ("2024-25", "UCIrvine", 75.0)]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO TeamStats (team, season) VALUES ('UCIrvine', '2024-25')")
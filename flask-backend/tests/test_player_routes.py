@@ -0,0 +1,29 @@
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app(warm_up=False).test_client()
+
+
+@pytest.mark.parametrize("body, error", [
+    (["TY Johnson"], "Request body must be a JSON object"),
+    ("TY Johnson", "Request body must be a JSON object"),
+    (7, "Request body must be a JSON object"),
+    ({"players": "TY Johnson"}, "players must be a list of strings"),
+    ({"players": ["TY Johnson", 3]}, "players must be a list of strings"),
+    ({"players": ["TY Johnson"], "fields": "PPG"}, "fields must be a list of strings"),
+    ({"players": ["TY Johnson"], "fields": {"PPG": 1}}, "fields must be a list of strings"),
+])
+def test_compare_many_rejects_malformed_bodies(client, body, error):
+    response = client.post("/compare_many", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_compare_many_requires_players(client):
+    response = client.post("/compare_many", json={})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Missing player names"
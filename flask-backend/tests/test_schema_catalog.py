@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from schema_catalog import SchemaCatalog, count_tokens, match_teams
+
+
+@pytest.mark.parametrize("text, teams", [
+    ("How is UC Davis shooting?", ["UCDavis"]),
+    ("How many points does Davis score per game?", ["UCDavis"]),
+    ("Who leads Long Beach State in rebounds?", ["LongBeachState"]),
+    ("Compare Davis and Cal Poly rebounds", ["UCDavis", "CalPolySLO"]),
+    ("Tell me about Anthony Davis", []),
+    ("Any good restaurants near the beach?", []),
+    ("The page is slo to load", []),
+])
+def test_match_teams(text, teams):
+    assert match_teams(text) == teams
+
+
+def test_full_tokens_follow_the_database_version(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE TeamStats (team TEXT)")
+    catalog = SchemaCatalog(path)
+    texts = iter(["short table info", "much longer table info " * 20])
+    calls = []
+
+    def table_info():
+        calls.append(next(texts))
+        return calls[-1]
+
+    assert catalog.for_question("UC Davis", full_table_info=table_info)[1]["full_tokens"] == count_tokens(calls[0])
+    # Counted once per database version, not per question
+    catalog.for_question("UC Davis", full_table_info=table_info)
+    assert len(calls) == 1
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Extra (x TEXT)")
+    assert catalog.for_question("UC Davis", full_table_info=table_info)[1]["full_tokens"] == count_tokens(calls[1])
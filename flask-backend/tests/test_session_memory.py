@@ -0,0 +1,39 @@
+import threading
+import time
+
+from session_memory import SessionMemoryStore
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_batches_are_summarized_in_order_on_top_of_each_other():
+    release = threading.Event()
+    calls = []
+
+    def summarizer(previous, messages):
+        calls.append((previous, [m["content"] for m in messages]))
+        if len(calls) == 1:
+            release.wait(5)
+        return f"{previous}+{len(calls)}"
+
+    store = SessionMemoryStore(buffer_size=2, summary_threshold=2, summarizer=summarizer)
+    session = store.get("coach")
+    for i in range(4):
+        session.add_user_message(f"m{i}")
+    store.maybe_summarize(session)
+    wait_for(lambda: len(calls) == 1)
+
+    # A second batch overflows while the first is still being summarized
+    for i in range(4, 6):
+        session.add_user_message(f"m{i}")
+    store.maybe_summarize(session)
+    release.set()
+
+    wait_for(lambda: len(calls) == 2 and not session.summarizing)
+    assert calls == [("", ["m0", "m1"]), ("+1", ["m2", "m3"])]
+    assert session.summary == "+1+2"
@@ -0,0 +1,49 @@
+import os
+import shutil
+
+import pytest
+
+import ingest
+from sql_fast_path import IntentMatcher
+
+SHIPPED_DB = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "ucd-basketball.db"))
+
+
+@pytest.fixture(scope="module")
+def matcher(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "ucd-basketball.db")
+    shutil.copyfile(SHIPPED_DB, path)
+    ingest.ingest_if_stale(path)
+    return IntentMatcher(path)
+
+
+@pytest.mark.parametrize("question", [
+    "How many points does UC Davis allow per game?",
+    "How many points did UC Davis give up per game?",
+    "What do opponents shoot against UC Davis, FG%?",
+    "How many rebounds does UC Davis defense allow?",
+    "TY Johnson points compared with Barrington Hargress",
+    "Comparing UC Davis and UC Irvine rebounds",
+    "How many rebounds does he average for UC Davis?",
+    "Which UC Davis player has the fewest turnovers?",
+    "Which UC Davis player averages the least minutes?",
+    "Which UC Davis player has turnovers under 1?",
+    "UC Davis averages 10 assists, how does that rank in the conference?",
+    "How many points does UC Davis score at home?",
+    "UC Davis FG% in the first half",
+    "How many points does UC Davis score in wins?",
+])
+def test_routes_to_agent(matcher, question):
+    assert matcher.match(question) is None
+
+
+@pytest.mark.parametrize("question, kind, column", [
+    ("How many points does TY Johnson average?", "player", "PTS/gm"),
+    ("UC Davis defensive rebounds per game", "team", "DEF REB/gm"),
+    ("UC Davis team FG%", "team", "FG%"),
+    ("Who is the top scorer on UC Davis?", "leader", "PTS/gm"),
+])
+def test_simple_lookups_stay_on_fast_path(matcher, question, kind, column):
+    intent = matcher.match(question)
+    assert intent["kind"] == kind
+    assert column in intent["columns"]
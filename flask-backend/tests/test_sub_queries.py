@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+import chatbot_routes
+
+QUERIES = ["hung 1", "hung 2", "queued", "quick"]
+
+
+def test_queued_queries_time_out_with_the_batch(monkeypatch):
+    release = threading.Event()
+
+    def run_sub_query(agent, question):
+        if question.startswith("hung"):
+            release.wait(5)
+        return f"answer to {question}"
+
+    monkeypatch.setattr(chatbot_routes, "run_sub_query", run_sub_query)
+    start = time.monotonic()
+    try:
+        stats, errors = chatbot_routes.run_sub_queries(None, QUERIES, max_workers=2, timeout=0.2)
+    finally:
+        release.set()
+    assert time.monotonic() - start < 1
+    assert stats == []
+    assert errors == [f"Error querying '{q}': timed out after 0.2s" for q in QUERIES]
+
+
+def test_async_queued_queries_time_out_with_the_batch(monkeypatch):
+    async def arun_sub_query(agent, question):
+        if question.startswith("hung"):
+            await asyncio.sleep(5)
+        return f"answer to {question}"
+
+    monkeypatch.setattr(chatbot_routes, "arun_sub_query", arun_sub_query)
+    start = time.monotonic()
+    stats, errors = asyncio.run(chatbot_routes.arun_sub_queries(None, QUERIES, max_workers=2, timeout=0.2))
+    assert time.monotonic() - start < 1
+    assert stats == []
+    assert len(errors) == len(QUERIES)
+
+
+def test_quick_queries_are_kept(monkeypatch):
+    monkeypatch.setattr(chatbot_routes, "run_sub_query", lambda agent, question: f"answer to {question}")
+    stats, errors = chatbot_routes.run_sub_queries(None, ["a", "b", "c"], max_workers=2, timeout=1)
+    assert stats == ["answer to a", "answer to b", "answer to c"]
+    assert errors == []
@@ -0,0 +1,58 @@
+"""
+Production entry point (see gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the gunicorn master imports this module once, before forking the
+workers. preload() builds what is otherwise built lazily by the first requests: the
+AllPlayers and GameLog ingests, the roster and radar indexes, and the chatbot's model, database
+catalog, agent prompt, compiled SQL agent, schema catalog and intent matcher. The
+workers inherit all of it copy-on-write instead of each building their own.
+
+Connections don't survive the fork (database.after_fork() and the pid checks in
+database.py / db_cache.py take care of that), so warm_worker() runs in each worker
+once it has started: it opens the worker's SQLite connections and sends a few
+internal requests, so its first real request doesn't pay for per-process setup.
+"""
+import time
+
+from app import CHAT_WARMUP, create_app
+
+# Cheap GET endpoints that between them touch every read-only blueprint and index
+WARM_UP_PATHS = (
+    "/players",
+    "/api/player-efficiency/UCDavis",
+    "/api/radar-chart/batch?teams=UCDavis,conference-average",
+    "/api/game-log/summary",
+)
+
+
+def preload():
+    from chatbot_routes import log_with_time, warm_up
+    from game_log import game_log_store
+    from player_store import ensure_player_store
+    from radar_chart_routes import radar_vectors
+    from roster_index import roster_index
+
+    start = time.perf_counter()
+    ensure_player_store()
+    roster_index.ensure_built()
+    radar_vectors.ensure_built()
+    game_log_store.ensure()
+    warm_up()
+    log_with_time(f"[Setup] Preloaded in {time.perf_counter() - start:.2f}s")
+
+
+def warm_worker(wsgi_app=None):
+    """ Per-process warm-up, run in each worker after it is forked """
+    from database import get_pool
+
+    get_pool().warm(2)
+    client = (wsgi_app or app).test_client()
+    for path in WARM_UP_PATHS:
+        client.get(path)
+
+
+app = create_app(warm_up=False)
+if CHAT_WARMUP:
+    preload()
@@ -7,6 +7,8 @@ function Chatbot({ onRelevantTeams }) {
     const [messages, setMessages] = useState([]);
     const [loading, setLoading] = useState(false);
     const [isUserTyping, setIsUserTyping] = useState(false);
+    // Conversation memory on the backend is kept per thread
+    const threadIdRef = useRef(null);
     const chatEndRef = useRef(null);
 
     useEffect(() => {
@@ -29,8 +31,13 @@ function Chatbot({ onRelevantTeams }) {
         try {
             const response = await axios.post("http://127.0.0.1:5001/chat", {
                 message: userMessage,
+                thread_id: threadIdRef.current,
             });
 
+            if (response.data.thread_id) {
+                threadIdRef.current = response.data.thread_id;
+            }
+
             // Pass relevant_teams up if available
             if (onRelevantTeams && response.data.relevant_teams) {
                 onRelevantTeams(response.data.relevant_teams);
@@ -16,25 +16,14 @@ const RadarComparisonChart = ({ team1, team2, onTeamChange }) => {
 
     useEffect(() => {
         const fetchStats = async () => {
+            // "Conference Average" is plotted as the mean of the conference's teams
+            const key = (team) => team === "Conference Average" ? "conference-average" : team;
             try {
-                let team1Data, team2Data;
-                if (team1 === "Conference Average") {
-                    const res = await fetch(`http://localhost:5001/api/radar-chart/conference-average`);
-                    team1Data = await res.json();
-                } else {
-                    const res = await fetch(`http://localhost:5001/api/radar-chart/${team1}`);
-                    team1Data = await res.json();
-                }
-                setTeam1Stats(team1Data.normalized_stats);
-
-                if (team2 === "Conference Average") {
-                    const res = await fetch(`http://localhost:5001/api/radar-chart/conference-average`);
-                    team2Data = await res.json();
-                } else {
-                    const res = await fetch(`http://localhost:5001/api/radar-chart/${team2}`);
-                    team2Data = await res.json();
-                }
-                setTeam2Stats(team2Data.normalized_stats);
+                const teams = [key(team1), key(team2)].map(encodeURIComponent).join(",");
+                const res = await fetch(`http://localhost:5001/api/radar-chart/batch?teams=${teams}`);
+                const data = await res.json();
+                setTeam1Stats(data.teams[key(team1)]);
+                setTeam2Stats(data.teams[key(team2)]);
             } catch (error) {
                 console.error("Failed to load stats:", error);
             }